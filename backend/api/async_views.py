@@ -0,0 +1,67 @@
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection
+
+from .metrics import install_query_tracking
+
+READ_METHODS = ("GET", "HEAD")
+
+
+def async_view(view):
+    """Асинхронная обертка, выполняющая view в общем пуле потоков"""
+
+    # Django 3.2 под ASGI выполняет синхронные view в одном потоке,
+    # поэтому view уходит в пул, а соединения с БД живут в его потоках.
+    def run(request, *args, **kwargs):
+        close_old_connections()
+        install_query_tracking(connection)
+        try:
+            response = view(request, *args, **kwargs)
+            if hasattr(response, "render"):
+                response.render()
+            return response
+        finally:
+            close_old_connections()
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        return await sync_to_async(run, thread_sensitive=False)(
+            request, *args, **kwargs
+        )
+
+    return wrapper
+
+
+def async_read_view(view):
+    """Чтение уходит в пул потоков, запись остается синхронной"""
+    pooled = async_view(view)
+    blocking = sync_to_async(view)
+
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        if request.method in READ_METHODS:
+            return await pooled(request, *args, **kwargs)
+        return await blocking(request, *args, **kwargs)
+
+    return wrapper
+
+
+class AsyncReadMixin:
+    """Асинхронные маршруты для действий чтения при работе под ASGI.
+
+    В пул потоков уходят только GET и HEAD; запись на тех же маршрутах
+    выполняется в синхронном потоке Django, как без миксина.
+    """
+
+    async_actions = ("list", "retrieve")
+
+    @classmethod
+    def as_view(cls, actions=None, **initkwargs):
+        view = super().as_view(actions, **initkwargs)
+        if settings.ASYNC_READ_VIEWS and set(actions.values()) & set(
+            cls.async_actions
+        ):
+            return async_read_view(view)
+        return view
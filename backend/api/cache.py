@@ -0,0 +1,196 @@
+import copy
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import parse_etags
+from rest_framework import status
+from rest_framework.response import Response
+
+from recipes.models import Cart, Favorite, Recipe
+from users.models import Follow
+from .catalog import get_catalog_version
+from .metrics import timed_serialization
+
+USER_FILTERS = ("is_favorited", "is_in_shopping_cart")
+
+
+class CatalogCacheMixin:
+    """Кэш ответов справочника с ETag по версии каталога"""
+
+    catalog_model = None
+
+    def list(self, request, *args, **kwargs):
+        return self.get_cached_response(super().list, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.get_cached_response(super().retrieve, *args, **kwargs)
+
+    def get_cache_params(self):
+        """Параметры запроса, от которых зависит ответ; прочие в ключ
+        не попадают, чтобы лишние параметры не плодили записи кэша"""
+        return []
+
+    def get_cached_response(self, view, *args, **kwargs):
+        request = self.request
+        version = get_catalog_version(self.catalog_model)
+        params = json.dumps(
+            [
+                request.path,
+                request.accepted_renderer.format,
+                *self.get_cache_params(),
+            ]
+        )
+        digest = hashlib.md5(params.encode()).hexdigest()
+        key = (
+            f"catalog:{self.catalog_model._meta.label_lower}:{version}:"
+            f"{digest}"
+        )
+        etag = f'"{hashlib.md5(key.encode()).hexdigest()}"'
+        if etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+            response = Response(status=status.HTTP_304_NOT_MODIFIED)
+        else:
+            data = cache.get(key)
+            if data is not None:
+                response = Response(data)
+            else:
+                response = view(request, *args, **kwargs)
+                if response.status_code != status.HTTP_200_OK:
+                    return response
+                cache.set(key, response.data, settings.CATALOG_CACHE_TIMEOUT)
+        response["ETag"] = etag
+        response["Cache-Control"] = (
+            f"public, max-age={settings.CATALOG_CACHE_MAX_AGE}"
+        )
+        return response
+
+
+def recipe_version_key(recipe_id):
+    return f"feed:recipe:{recipe_id}"
+
+
+def get_recipe_versions(recipe_ids, create=False):
+    keys = {recipe_version_key(pk): pk for pk in recipe_ids}
+    if create:
+        for key in keys:
+            cache.add(key, time.time_ns(), None)
+    return {
+        keys[key]: version for key, version in cache.get_many(keys).items()
+    }
+
+
+def invalidate_recipes(*recipe_ids):
+    """Делает устаревшими только страницы ленты с этими рецептами"""
+    cache.delete_many([recipe_version_key(pk) for pk in recipe_ids])
+
+
+class RecipeFeedCache:
+    """Кэш страниц ленты рецептов.
+
+    Страница хранится без полей, зависящих от пользователя, вместе с
+    версиями попавших в нее рецептов. Эти поля накладываются при
+    чтении тремя запросами по id рецептов и авторов страницы.
+    """
+
+    def __init__(self, request):
+        self.request = request
+
+    def is_cacheable(self):
+        if not self.request.user.is_authenticated:
+            return True
+        return all(
+            self.request.query_params.get(name, "0") in ("", "0")
+            for name in USER_FILTERS
+        )
+
+    def get_key(self):
+        params = self.request.query_params
+        normalized = json.dumps(
+            [
+                self.request.get_host(),
+                sorted(set(params.getlist("tags"))),
+                params.get("author", ""),
+                params.get("page", "1"),
+                params.get("cursor"),
+                params.get("count"),
+                params.get("limit", ""),
+            ]
+        )
+        digest = hashlib.md5(normalized.encode()).hexdigest()
+        return f"feed:{get_catalog_version(Recipe)}:{digest}"
+
+    def get(self):
+        entry = cache.get(self.get_key())
+        if entry is None:
+            return None
+        if get_recipe_versions(entry["versions"]) != entry["versions"]:
+            return None
+        return self.render(entry["data"])
+
+    @timed_serialization
+    def render(self, data):
+        """Копия страницы из кэша с полями текущего пользователя"""
+        return self.apply_user_fields(copy.deepcopy(data))
+
+    def set(self, data):
+        data = copy.deepcopy(data)
+        for recipe in data["results"]:
+            recipe["is_favorited"] = False
+            recipe["is_in_shopping_cart"] = False
+            recipe["author"]["is_subscribed"] = False
+        versions = get_recipe_versions(
+            [recipe["id"] for recipe in data["results"]], create=True
+        )
+        cache.set(
+            self.get_key(),
+            {"data": data, "versions": versions},
+            settings.FEED_CACHE_TIMEOUT,
+        )
+
+    def apply_user_fields(self, data):
+        user = self.request.user
+        if not user.is_authenticated:
+            return data
+        results = data["results"]
+        recipe_ids = [recipe["id"] for recipe in results]
+        favorited = set(
+            Favorite.objects.filter(
+                user=user, recipe_id__in=recipe_ids
+            ).values_list("recipe_id", flat=True)
+        )
+        in_cart = set(
+            Cart.objects.filter(
+                user=user, recipe_id__in=recipe_ids
+            ).values_list("recipe_id", flat=True)
+        )
+        subscribed = set(
+            Follow.objects.filter(
+                user=user,
+                author_id__in={recipe["author"]["id"] for recipe in results},
+            ).values_list("author_id", flat=True)
+        )
+        for recipe in results:
+            recipe["is_favorited"] = recipe["id"] in favorited
+            recipe["is_in_shopping_cart"] = recipe["id"] in in_cart
+            recipe["author"]["is_subscribed"] = (
+                recipe["author"]["id"] in subscribed
+            )
+        return data
+
+
+class RecipeFeedCacheMixin:
+    """Кэширование списка рецептов"""
+
+    def list(self, request, *args, **kwargs):
+        feed_cache = RecipeFeedCache(request)
+        if not feed_cache.is_cacheable():
+            return super().list(request, *args, **kwargs)
+        data = feed_cache.get()
+        if data is not None:
+            return Response(data)
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == status.HTTP_200_OK:
+            feed_cache.set(response.data)
+        return response
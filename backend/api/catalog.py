@@ -0,0 +1,22 @@
+import time
+
+from django.core.cache import cache
+
+
+def catalog_version_key(model):
+    return f"catalog_version:{model._meta.label_lower}"
+
+
+def get_catalog_version(model):
+    """Версия справочника, общая для всех воркеров через кэш"""
+    key = catalog_version_key(model)
+    cache.add(key, time.time_ns(), None)
+    return cache.get(key)
+
+
+def bump_catalog_version(model):
+    key = catalog_version_key(model)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), None)
@@ -0,0 +1,177 @@
+from collections import defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
+
+from recipes.models import IngredientAmount, Recipe
+from users.models import Follow
+from .fields import media_url, rendition_urls
+
+UserModel = get_user_model()
+
+AUTHOR_FIELDS = ("id", "email", "username", "first_name", "last_name")
+
+
+class FastListSerializer:
+    """Сериализатор только для чтения: строки .values() сразу в словари.
+
+    Повторяет вывод DRF-сериализаторов без создания моделей и полей.
+    """
+
+    row_fields = ()
+
+    def __init__(self, rows, many=True, context=None):
+        self.rows = rows
+        self.context = context or {}
+
+    @classmethod
+    def get_rows(cls, queryset):
+        return queryset.prefetch_related(None).values(*cls.row_fields)
+
+    @property
+    def data(self):
+        return self.to_representation(self.rows)
+
+    def to_representation(self, rows):
+        raise NotImplementedError
+
+
+class FastRecipeListSerializer(FastListSerializer):
+    """Лента рецептов, совпадающая по выводу с RecipeSerializer"""
+
+    row_fields = (
+        "id",
+        "author_id",
+        "name",
+        "image",
+        "renditions",
+        "text",
+        "cooking_time",
+        "pub_date",
+        "is_favorited",
+        "is_in_shopping_cart",
+    )
+
+    def get_authors(self, author_ids):
+        user = self.context["request"].user
+        authors = UserModel.objects.filter(pk__in=author_ids).annotate(
+            is_subscribed=Exists(
+                Follow.objects.filter(author=OuterRef("pk"), user_id=user.pk)
+            )
+        )
+        return {
+            author["id"]: author
+            for author in authors.values(*AUTHOR_FIELDS, "is_subscribed")
+        }
+
+    def get_tags(self, recipe_ids):
+        tags = defaultdict(list)
+        rows = (
+            Recipe.tags.through.objects.filter(recipe_id__in=recipe_ids)
+            .order_by("tag__name")
+            .values_list(
+                "recipe_id", "tag_id", "tag__name", "tag__color", "tag__slug"
+            )
+        )
+        for recipe_id, tag_id, name, color, slug in rows:
+            tags[recipe_id].append(
+                {"id": tag_id, "name": name, "color": color, "slug": slug}
+            )
+        return tags
+
+    def get_ingredients(self, recipe_ids):
+        ingredients = defaultdict(list)
+        rows = IngredientAmount.objects.filter(
+            recipe_id__in=recipe_ids
+        ).values_list(
+            "recipe_id",
+            "ingredient_id",
+            "ingredient__name",
+            "ingredient__measurement_unit",
+            "amount",
+        )
+        for recipe_id, ingredient_id, name, unit, amount in rows:
+            ingredients[recipe_id].append(
+                {
+                    "id": ingredient_id,
+                    "name": name,
+                    "measurement_unit": unit,
+                    "amount": amount,
+                }
+            )
+        return ingredients
+
+    def to_representation(self, rows):
+        if not rows:
+            return []
+        request = self.context.get("request")
+        recipe_ids = [row["id"] for row in rows]
+        authors = self.get_authors({row["author_id"] for row in rows})
+        ingredients = self.get_ingredients(recipe_ids)
+        tags = self.get_tags(recipe_ids)
+        return [
+            {
+                "id": row["id"],
+                "author": dict(authors[row["author_id"]]),
+                "ingredients": ingredients[row["id"]],
+                "name": row["name"],
+                "is_favorited": row["is_favorited"],
+                "is_in_shopping_cart": row["is_in_shopping_cart"],
+                "image": media_url(row["image"], request),
+                "images": rendition_urls(row["renditions"], request),
+                "text": row["text"],
+                "tags": tags[row["id"]],
+                "cooking_time": row["cooking_time"],
+            }
+            for row in rows
+        ]
+
+
+class FastFollowListSerializer(FastListSerializer):
+    """Подписки, совпадающие по выводу с FollowListSerializer.
+
+    Последние рецепты авторов берутся из context["latest_recipes"].
+    """
+
+    row_fields = AUTHOR_FIELDS + ("recipes_count",)
+
+    def get_recipes(self, author_ids):
+        request = self.context.get("request")
+        recipes = defaultdict(list)
+        rows = (
+            self.context["latest_recipes"]
+            .filter(author_id__in=author_ids)
+            .values_list(
+                "author_id",
+                "id",
+                "name",
+                "image",
+                "renditions",
+                "cooking_time",
+            )
+        )
+        for author_id, pk, name, image, renditions, cooking_time in rows:
+            recipes[author_id].append(
+                {
+                    "id": pk,
+                    "name": name,
+                    "image": media_url(image, request),
+                    "images": rendition_urls(renditions, request),
+                    "cooking_time": cooking_time,
+                }
+            )
+        return recipes
+
+    def to_representation(self, rows):
+        if not rows:
+            return []
+        recipes = self.get_recipes([row["id"] for row in rows])
+        return [
+            {
+                **{field: row[field] for field in AUTHOR_FIELDS},
+                "is_subscribed": True,
+                "recipes": recipes[row["id"]],
+                "recipes_count": row["recipes_count"],
+            }
+            for row in rows
+        ]
@@ -0,0 +1,125 @@
+import binascii
+import uuid
+from base64 import b64decode
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import UploadedFile
+from drf_extra_fields.fields import Base64ImageField
+from PIL import Image
+from rest_framework import serializers
+
+BASE64_CHUNK_SIZE = 64 * 1024
+
+
+def media_url(name, request=None):
+    """Ссылка на файл хранилища, как ее отдает ImageField в DRF"""
+    if not name:
+        return None
+    url = default_storage.url(name)
+    if request is not None:
+        return request.build_absolute_uri(url)
+    return url
+
+
+def rendition_urls(renditions, request=None):
+    return {
+        rendition: {
+            image_format: media_url(path, request)
+            for image_format, path in formats.items()
+        }
+        for rendition, formats in renditions.get("images", {}).items()
+    }
+
+
+class RecipeImagesField(serializers.Field):
+    """Ссылки на уменьшенные копии фото рецепта"""
+
+    def __init__(self, **kwargs):
+        kwargs["source"] = "renditions"
+        kwargs["read_only"] = True
+        super().__init__(**kwargs)
+
+    def to_representation(self, renditions):
+        return rendition_urls(renditions, self.context.get("request"))
+
+
+class LimitedBase64ImageField(Base64ImageField):
+    """Фото в base64: потоковое декодирование с лимитами размера"""
+
+    default_error_messages = {
+        "invalid_base64": "Фото должно быть строкой в base64",
+        "too_large": "Размер фото превышает {max_bytes} байт",
+        "too_many_pixels": "Фото больше {max_pixels} пикселей",
+        "invalid_image": "Загрузите корректное изображение",
+        "invalid_type": "Допустимые форматы: {types}",
+    }
+
+    def to_internal_value(self, base64_data):
+        if base64_data in self.EMPTY_VALUES:
+            return None
+        if not isinstance(base64_data, str):
+            self.fail("invalid_base64")
+        header, separator, payload = base64_data.partition(";base64,")
+        if not separator:
+            header, payload = "", base64_data
+        max_bytes = settings.RECIPE_IMAGE_MAX_BYTES
+        if len(payload) // 4 * 3 > max_bytes + 2:
+            self.fail("too_large", max_bytes=max_bytes)
+        file = SpooledTemporaryFile(max_size=settings.RECIPE_IMAGE_SPOOL_SIZE)
+        try:
+            size = self.decode(payload, file)
+            file.seek(0)
+            extension = self.check_image(file)
+        except Exception:
+            file.close()
+            raise
+        file.seek(0)
+        content_type = None
+        if self.trust_provided_content_type and header:
+            content_type = header.replace("data:", "")
+        return UploadedFile(
+            file=file,
+            name=f"{uuid.uuid4()}.{extension}",
+            content_type=content_type,
+            size=size,
+        )
+
+    def decode(self, payload, file):
+        """Декодирует base64 частями, не держа в памяти всё фото"""
+        if len(payload) % 4:
+            self.fail("invalid_base64")
+        size = 0
+        for start in range(0, len(payload), BASE64_CHUNK_SIZE):
+            try:
+                chunk = b64decode(
+                    payload[start:start + BASE64_CHUNK_SIZE], validate=True
+                )
+            except (binascii.Error, ValueError):
+                self.fail("invalid_base64")
+            file.write(chunk)
+            size += len(chunk)
+        if not size:
+            self.fail("invalid_image")
+        return size
+
+    def check_image(self, file):
+        """Проверяет формат и размеры по заголовку, затем целостность"""
+        max_pixels = settings.RECIPE_IMAGE_MAX_PIXELS
+        try:
+            with Image.open(file) as image:
+                width, height = image.size
+                if width * height > max_pixels:
+                    self.fail("too_many_pixels", max_pixels=max_pixels)
+                extension = (image.format or "").lower()
+                if extension not in self.ALLOWED_TYPES:
+                    self.fail(
+                        "invalid_type", types=", ".join(self.ALLOWED_TYPES)
+                    )
+                image.verify()
+        except serializers.ValidationError:
+            raise
+        except (OSError, SyntaxError, Image.DecompressionBombError):
+            self.fail("invalid_image")
+        return extension
@@ -0,0 +1,238 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from functools import wraps
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+POOL_WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+QUERY_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100)
+
+current_metrics = ContextVar("current_metrics", default=None)
+
+
+class RequestMetrics:
+    """Замеры одного запроса: число и время запросов к БД, сериализация"""
+
+    def __init__(self):
+        self.endpoint = None
+        self.queries = 0
+        self.db_time = 0.0
+        self.serializer_time = 0.0
+        self.started = time.perf_counter()
+        self.total_time = None
+
+    def track_query(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.queries += 1
+            self.db_time += time.perf_counter() - start
+
+    def finish(self):
+        self.total_time = time.perf_counter() - self.started
+
+    def server_timing(self):
+        return ", ".join(
+            (
+                f'db;dur={self.db_time * 1000:.2f};desc="{self.queries} q"',
+                f"serializer;dur={self.serializer_time * 1000:.2f}",
+                f"total;dur={self.total_time * 1000:.2f}",
+            )
+        )
+
+
+class Histogram:
+    def __init__(self, name, description, buckets, label="endpoint"):
+        self.name = name
+        self.description = description
+        self.buckets = buckets
+        self.label = label
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, endpoint, value):
+        with self.lock:
+            counts, total = self.series.get(
+                endpoint, ([0] * (len(self.buckets) + 1), 0)
+            )
+            counts[bisect_left(self.buckets, value)] += 1
+            self.series[endpoint] = (counts, total + value)
+
+    def render(self, worker):
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self.lock:
+            series = sorted(
+                (endpoint, (list(counts), total))
+                for endpoint, (counts, total) in self.series.items()
+            )
+        for endpoint, (counts, total) in series:
+            label = f'{self.label}="{endpoint}",worker="{worker}"'
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{{label},le="{bound}"}} {cumulative}'
+                )
+            lines.append(f"{self.name}_sum{{{label}}} {total}")
+            lines.append(f"{self.name}_count{{{label}}} {cumulative}")
+        return lines
+
+
+class MetricsRegistry:
+    """Агрегированные метрики запросов текущего процесса.
+
+    Каждый воркер gunicorn считает свои метрики и отдает их с меткой
+    worker (pid процесса); суммировать по воркерам нужно в Prometheus,
+    например sum without (worker) (...). Ответ /api/metrics/ приходит от
+    одного случайного воркера, поэтому при нескольких воркерах метрики
+    нужно собирать с каждого из них.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.histograms = {
+            "total_time": Histogram(
+                "foodgram_request_duration_seconds",
+                "Полное время обработки запроса",
+                DURATION_BUCKETS,
+            ),
+            "db_time": Histogram(
+                "foodgram_request_db_seconds",
+                "Время запросов к БД",
+                DURATION_BUCKETS,
+            ),
+            "serializer_time": Histogram(
+                "foodgram_request_serializer_seconds",
+                "Время сериализации",
+                DURATION_BUCKETS,
+            ),
+            "queries": Histogram(
+                "foodgram_request_queries",
+                "Число запросов к БД",
+                QUERY_BUCKETS,
+            ),
+        }
+        self.over_budget = {}
+        self.pool_wait = Histogram(
+            "foodgram_db_pool_wait_seconds",
+            "Ожидание соединения из пула",
+            POOL_WAIT_BUCKETS,
+            label="database",
+        )
+        self.counters = {
+            "foodgram_db_connections_opened_total": (
+                "Открытые соединения с БД",
+                {},
+            ),
+            "foodgram_db_pool_checkouts_total": (
+                "Выданные пулом соединения",
+                {},
+            ),
+            "foodgram_db_pool_timeouts_total": (
+                "Таймауты ожидания соединения из пула",
+                {},
+            ),
+        }
+
+    def increment(self, name, database):
+        with self.lock:
+            series = self.counters[name][1]
+            series[database] = series.get(database, 0) + 1
+
+    def record_pool_checkout(self, database, wait, acquired):
+        self.pool_wait.observe(database, wait)
+        self.increment(
+            "foodgram_db_pool_checkouts_total"
+            if acquired
+            else "foodgram_db_pool_timeouts_total",
+            database,
+        )
+
+    def record(self, metrics, over_budget):
+        endpoint = metrics.endpoint or "unresolved"
+        for field, histogram in self.histograms.items():
+            histogram.observe(endpoint, getattr(metrics, field))
+        if over_budget:
+            with self.lock:
+                self.over_budget[endpoint] = (
+                    self.over_budget.get(endpoint, 0) + 1
+                )
+
+    def render(self):
+        worker = os.getpid()
+        lines = []
+        for histogram in self.histograms.values():
+            lines.extend(histogram.render(worker))
+        with self.lock:
+            name = "foodgram_query_budget_exceeded_total"
+            lines.append(
+                f"# HELP {name} Запросы сверх бюджета обращений к БД"
+            )
+            lines.append(f"# TYPE {name} counter")
+            for endpoint, count in sorted(self.over_budget.items()):
+                lines.append(
+                    f'{name}{{endpoint="{endpoint}",worker="{worker}"}} '
+                    f"{count}"
+                )
+        lines.extend(self.pool_wait.render(worker))
+        with self.lock:
+            for name, (description, series) in self.counters.items():
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} counter")
+                for database, count in sorted(series.items()):
+                    lines.append(
+                        f'{name}{{database="{database}",worker="{worker}"}} '
+                        f"{count}"
+                    )
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+
+def track_current_query(execute, sql, params, many, context):
+    metrics = current_metrics.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.track_query(execute, sql, params, many, context)
+
+
+def install_query_tracking(connection):
+    """Учет запросов соединения в метриках запроса из contextvar.
+
+    Под ASGI синхронный код разных запросов выполняется в общих потоках,
+    поэтому запрос к БД относится к метрикам по контексту, а не по потоку.
+    """
+    if track_current_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(track_current_query)
+
+
+def timed_serialization(to_representation):
+    @wraps(to_representation)
+    def wrapper(*args, **kwargs):
+        metrics = current_metrics.get()
+        if metrics is None:
+            return to_representation(*args, **kwargs)
+        start = time.perf_counter()
+        try:
+            return to_representation(*args, **kwargs)
+        finally:
+            metrics.serializer_time += time.perf_counter() - start
+    return wrapper
+
+
+class SerializerTimingMixin:
+    """Учитывает время сериализации в метриках запроса"""
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        serializer.to_representation = timed_serialization(
+            serializer.to_representation
+        )
+        return serializer
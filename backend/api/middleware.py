@@ -0,0 +1,107 @@
+import asyncio
+import logging
+
+from django.conf import settings
+from django.db import connection
+
+from .metrics import (
+    RequestMetrics,
+    current_metrics,
+    install_query_tracking,
+    registry
+)
+
+logger = logging.getLogger(__name__)
+
+
+class RequestMetricsMiddleware:
+    """Замеры запросов к API: Server-Timing, бюджет запросов, гистограммы"""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = asyncio.iscoroutinefunction(get_response)
+        if self.is_async:
+            # Как в MiddlewareMixin: Django видит в экземпляре корутину,
+            # и под ASGI цепочка middleware не уходит в синхронный поток
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        metrics = self.start(request)
+        if metrics is None:
+            return self.get_response(request)
+        install_query_tracking(connection)
+        token = current_metrics.set(metrics)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.complete(response, metrics)
+
+    async def __acall__(self, request):
+        metrics = self.start(request)
+        if metrics is None:
+            return await self.get_response(request)
+        token = current_metrics.set(metrics)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_metrics.reset(token)
+        return self.complete(response, metrics)
+
+    def start(self, request):
+        if not request.path.startswith(settings.REQUEST_METRICS_PATHS):
+            return None
+        metrics = RequestMetrics()
+        request.metrics = metrics
+        return metrics
+
+    def complete(self, response, metrics):
+        if response.streaming:
+            response.streaming_content = self.stream(
+                response.streaming_content, metrics
+            )
+            return response
+        self.finish(metrics)
+        response["Server-Timing"] = metrics.server_timing()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = getattr(request, "metrics", None)
+        if metrics is None:
+            return
+        # Под ASGI вызывается в потоке, где выполняются синхронные view
+        install_query_tracking(connection)
+        view_class = getattr(view_func, "cls", None)
+        if view_class is None:
+            metrics.endpoint = view_func.__name__
+            return
+        actions = getattr(view_func, "actions", None) or {}
+        action = actions.get(request.method.lower(), request.method.lower())
+        metrics.endpoint = f"{view_class.__name__}.{action}"
+
+    def stream(self, content, metrics):
+        """Учитывает запросы, выполняемые при отдаче потокового ответа"""
+        install_query_tracking(connection)
+        token = current_metrics.set(metrics)
+        try:
+            yield from content
+        finally:
+            current_metrics.reset(token)
+            self.finish(metrics)
+
+    def finish(self, metrics):
+        metrics.finish()
+        over_budget = metrics.queries > settings.REQUEST_QUERY_BUDGET
+        if over_budget:
+            logger.warning(
+                "%s: %s запросов к БД при бюджете %s",
+                metrics.endpoint,
+                metrics.queries,
+                settings.REQUEST_QUERY_BUDGET,
+            )
+        registry.record(metrics, over_budget)
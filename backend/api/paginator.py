@@ -1,6 +1,240 @@
-from rest_framework.pagination import PageNumberPagination
+import hashlib
+import json
+from collections import OrderedDict
+from datetime import datetime
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (
+    Cursor,
+    CursorPagination,
+    PageNumberPagination
+)
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class ExactCount:
+    """Точный COUNT(*)"""
+
+    def count(self, queryset):
+        return queryset.count()
+
+
+class CachedCount(ExactCount):
+    """Точный COUNT(*), закэшированный по тексту запроса"""
+
+    def count(self, queryset):
+        sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+        key = "count:" + hashlib.md5(f"{sql}{params}".encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = super().count(queryset)
+            cache.set(key, count, settings.PAGINATION_COUNT_CACHE_TIMEOUT)
+        return count
+
+
+class EstimatedCount(ExactCount):
+    """Оценка планировщика PostgreSQL для больших выборок"""
+
+    def count(self, queryset):
+        connection = connections[queryset.db]
+        if connection.vendor != "postgresql":
+            return super().count(queryset)
+        sql, params = queryset.query.get_compiler(queryset.db).as_sql()
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+            plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        estimate = plan[0]["Plan"]["Plan Rows"]
+        if estimate < settings.PAGINATION_COUNT_ESTIMATE_THRESHOLD:
+            return super().count(queryset)
+        return estimate
+
+
+class CountStrategyPaginator(Paginator):
+    """Paginator, считающий объекты выбранной в настройках стратегией"""
+
+    @cached_property
+    def count(self):
+        strategy = import_string(settings.PAGINATION_COUNT_STRATEGY)()
+        return strategy.count(self.object_list)
 
 
 class LimitedPagination(PageNumberPagination):
     page_size_query_param = "limit"
     page_size = 6
+    django_paginator_class = CountStrategyPaginator
+    count_query_param = "count"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.include_count = request.query_params.get(
+            self.count_query_param
+        ) not in ("0", "false")
+        if self.include_count:
+            return super().paginate_queryset(queryset, request, view)
+        return self.paginate_without_count(queryset, request)
+
+    def paginate_without_count(self, queryset, request):
+        """Страница без COUNT(*): наличие следующей по лишней строке"""
+        self.request = request
+        page_size = self.get_page_size(request)
+        try:
+            self.page_number = int(
+                request.query_params.get(self.page_query_param, 1)
+            )
+        except ValueError:
+            raise NotFound(self.invalid_page_message)
+        if self.page_number < 1:
+            raise NotFound(self.invalid_page_message)
+        start = (self.page_number - 1) * page_size
+        rows = list(queryset[start:start + page_size + 1])
+        self.has_next = len(rows) > page_size
+        return rows[:page_size]
+
+    def get_next_link(self):
+        if self.include_count:
+            return super().get_next_link()
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.page_query_param,
+            self.page_number + 1,
+        )
+
+    def get_previous_link(self):
+        if self.include_count:
+            return super().get_previous_link()
+        if self.page_number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.page_number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(
+            url, self.page_query_param, self.page_number - 1
+        )
+
+    def get_paginated_response(self, data):
+        if self.include_count:
+            return super().get_paginated_response(data)
+        return Response(
+            OrderedDict(
+                [
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+
+class LimitedCursorPagination(CursorPagination):
+    """Курсорная пагинация по составному ключу (pub_date, id).
+
+    В курсоре хранится пара значений последней (или первой) записи
+    страницы, поэтому рецепты с одинаковой датой не повторяются и не
+    теряются, а смещение в курсоре не используется.
+    """
+
+    page_size_query_param = "limit"
+    page_size = 6
+    ordering = ("-pub_date", "-id")
+
+    def encode_position(self, instance):
+        # Быстрое чтение ленты отдает словари из values()
+        if isinstance(instance, dict):
+            pub_date, pk = instance["pub_date"], instance["id"]
+        else:
+            pub_date, pk = instance.pub_date, instance.pk
+        return f"{pub_date.isoformat()}|{pk}"
+
+    def decode_position(self, position):
+        try:
+            pub_date, pk = position.split("|")
+            return datetime.fromisoformat(pub_date), int(pk)
+        except (AttributeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor.reverse
+        if reverse:
+            queryset = queryset.order_by("pub_date", "id")
+        else:
+            queryset = queryset.order_by("-pub_date", "-id")
+        position = self.cursor and self.cursor.position
+        if position is not None:
+            pub_date, pk = self.decode_position(position)
+            # Условие по pub_date отдельно позволяет идти по индексу
+            if reverse:
+                queryset = queryset.filter(pub_date__gte=pub_date).filter(
+                    Q(pub_date__gt=pub_date) | Q(pk__gt=pk)
+                )
+            else:
+                queryset = queryset.filter(pub_date__lte=pub_date).filter(
+                    Q(pub_date__lt=pub_date) | Q(pk__lt=pk)
+                )
+        results = list(queryset[:self.page_size + 1])
+        self.page = results[:self.page_size]
+        has_more = len(results) > self.page_size
+        if reverse:
+            self.page.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+        self.display_page_controls = self.has_next or self.has_previous
+        return self.page
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if not self.page:
+            # Новее курсора ничего нет: следующая страница - первая
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return self.encode_cursor(
+            Cursor(0, False, self.encode_position(self.page[-1]))
+        )
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        position = (
+            self.encode_position(self.page[0])
+            if self.page
+            else self.cursor.position
+        )
+        return self.encode_cursor(Cursor(0, True, position))
+
+
+class RecipePagination(LimitedPagination):
+    """Постраничная пагинация либо курсорная, если передан ?cursor="""
+
+    cursor_query_param = "cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param in request.query_params:
+            self.cursor_paginator = LimitedCursorPagination()
+            return self.cursor_paginator.paginate_queryset(
+                queryset, request, view
+            )
+        self.cursor_paginator = None
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.cursor_paginator:
+            return self.cursor_paginator.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -1,2 +1,3 @@
 MIN_AMOUNT = 1
 MAX_AMOUNT = 66666
+RECIPES_LIMIT = 3
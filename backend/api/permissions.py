@@ -25,3 +25,10 @@ class AuthorOrAdminOrReadOnly(permissions.BasePermission):
             or obj.author == request.user
             or request.user.is_admin
         )
+
+
+class AdminOnly(permissions.BasePermission):
+    """Пермишен дающий доступ только админу"""
+
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.is_admin
@@ -0,0 +1,52 @@
+from django.db.models.fields.files import FieldFile
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils import encoders
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JS_ESCAPES = (
+    ("\u2028".encode(), b"\\u2028"),
+    ("\u2029".encode(), b"\\u2029"),
+)
+
+encoder = encoders.JSONEncoder()
+
+
+def default(obj):
+    """Типы вне orjson кодируются так же, как в JSONEncoder из DRF"""
+    if isinstance(obj, FieldFile):
+        return obj.url if obj else None
+    return encoder.default(obj)
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSON-рендерер на orjson с тем же выводом, что у JSONRenderer.
+
+    Без orjson, с отступами или при типах, которые orjson не кодирует
+    (нестроковые ключи, большие целые), рендерит стандартный json.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or data is None
+            or self.ensure_ascii
+            or not self.compact
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+        try:
+            ret = orjson.dumps(
+                data,
+                default=default,
+                option=orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+        for char, escaped in JS_ESCAPES:
+            if char in ret:
+                ret = ret.replace(char, escaped)
+        return ret
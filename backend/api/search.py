@@ -0,0 +1,83 @@
+import threading
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db.models import Case, IntegerField, Value, When
+from django.utils.module_loading import import_string
+
+from recipes.models import Ingredient
+from .catalog import get_catalog_version
+
+
+class IngredientSearch:
+    """Поиск ингредиентов: сначала совпадения с начала названия.
+
+    На PostgreSQL icontains/istartswith используют GIN-индекс pg_trgm
+    по UPPER(name), на остальных базах выполняется обычный LIKE.
+    """
+
+    def __init__(self, limit=None):
+        self.limit = limit or settings.INGREDIENT_SEARCH_LIMIT
+
+    def search(self, query):
+        return (
+            Ingredient.objects.filter(name__icontains=query)
+            .annotate(
+                rank=Case(
+                    When(name__istartswith=query, then=Value(0)),
+                    default=Value(1),
+                    output_field=IntegerField(),
+                )
+            )
+            .order_by("rank", "name")[:self.limit]
+        )
+
+
+class PrefixIndexIngredientSearch(IngredientSearch):
+    """Поиск по отсортированному индексу названий в памяти процесса.
+
+    Индекс строится при первом запросе и перестраивается, когда меняется
+    версия справочника ингредиентов.
+    """
+
+    _index = None
+    _lock = threading.Lock()
+
+    @classmethod
+    def build_index(cls, version):
+        ingredients = sorted(
+            Ingredient.objects.all(),
+            key=lambda ingredient: ingredient.name.casefold(),
+        )
+        names = [ingredient.name.casefold() for ingredient in ingredients]
+        return version, names, ingredients
+
+    @classmethod
+    def get_index(cls):
+        version = get_catalog_version(Ingredient)
+        index = cls._index
+        if index is None or index[0] != version:
+            with cls._lock:
+                index = cls._index
+                if index is None or index[0] != version:
+                    index = cls._index = cls.build_index(version)
+        return index
+
+    def search(self, query):
+        query = query.casefold()
+        _, names, ingredients = self.get_index()
+        start = bisect_left(names, query)
+        end = start
+        while end < len(names) and names[end].startswith(query):
+            end += 1
+        results = ingredients[start:min(end, start + self.limit)]
+        for position, name in enumerate(names):
+            if len(results) >= self.limit:
+                break
+            if query in name and not start <= position < end:
+                results.append(ingredients[position])
+        return results
+
+
+def get_ingredient_search(**kwargs):
+    return import_string(settings.INGREDIENT_SEARCH_BACKEND)(**kwargs)
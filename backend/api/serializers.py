@@ -1,21 +1,22 @@
-from django.contrib.auth import get_user_model
+import hashlib
+
+from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
-from drf_extra_fields.fields import Base64ImageField
+from django.db import transaction
 from rest_framework import serializers
-from rest_framework.validators import UniqueTogetherValidator
 
 from recipes.models import (
     Cart,
-    Favorite,
     Ingredient,
     IngredientAmount,
     Recipe,
     Tag
 )
 from users.serializers import UserReadSerializer
+from .cache import invalidate_recipes
+from .fields import LimitedBase64ImageField, RecipeImagesField
 from .params import MAX_AMOUNT, MIN_AMOUNT
-
-UserModel = get_user_model()
+from .shopping_list import ShoppingList
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -71,7 +72,8 @@ class RecipeSerializer(serializers.ModelSerializer):
     ingredients = IngredientAmountSerializer(
         many=True, source="ingredients_amount"
     )
-    image = Base64ImageField(required=False, allow_null=True)
+    image = LimitedBase64ImageField(required=False, allow_null=True)
+    images = RecipeImagesField()
     tags = TagSerializer(read_only=True, many=True)
     is_favorited = serializers.BooleanField(read_only=True)
     is_in_shopping_cart = serializers.BooleanField(read_only=True)
@@ -86,6 +88,7 @@ class RecipeSerializer(serializers.ModelSerializer):
             "is_favorited",
             "is_in_shopping_cart",
             "image",
+            "images",
             "text",
             "tags",
             "cooking_time",
@@ -116,20 +119,95 @@ class RecipeCreateSerializer(RecipeSerializer):
 
     @staticmethod
     def ingredient_save(recipe, ingredients):
-        ingredients_list = []
-        for ingredient in ingredients:
-            curent_ingredient = ingredient["ingredient"]["id"]
-            curent_amount = ingredient.get("amount")
-            ingredients_list.append(
-                IngredientAmount(
-                    recipe=recipe,
-                    ingredient=curent_ingredient,
-                    amount=curent_amount,
+        IngredientAmount.objects.bulk_create(
+            IngredientAmount(
+                recipe=recipe,
+                ingredient=ingredient["ingredient"]["id"],
+                amount=ingredient.get("amount"),
+            )
+            for ingredient in ingredients
+        )
+
+    @staticmethod
+    def update_ingredients(recipe, ingredients):
+        """Применяет только разницу ингредиентов, True при изменениях"""
+        current = {
+            amount.ingredient_id: amount
+            for amount in recipe.ingredients_amount.all()
+        }
+        wanted = {
+            ingredient["ingredient"]["id"].pk: ingredient.get("amount")
+            for ingredient in ingredients
+        }
+        removed = [
+            amount.pk
+            for ingredient_id, amount in current.items()
+            if ingredient_id not in wanted
+        ]
+        changed = []
+        created = []
+        for ingredient_id, value in wanted.items():
+            amount = current.get(ingredient_id)
+            if amount is None:
+                created.append(
+                    IngredientAmount(
+                        recipe=recipe,
+                        ingredient_id=ingredient_id,
+                        amount=value,
+                    )
                 )
+            elif amount.amount != value:
+                amount.amount = value
+                changed.append(amount)
+        if removed:
+            IngredientAmount.objects.filter(pk__in=removed).delete()
+        if changed:
+            IngredientAmount.objects.bulk_update(changed, ["amount"])
+        if created:
+            IngredientAmount.objects.bulk_create(created)
+        return bool(removed or changed or created)
+
+    @staticmethod
+    def update_tags(recipe, tags):
+        current = {tag.pk for tag in recipe.tags.all()}
+        wanted = {tag.pk for tag in tags}
+        if current - wanted:
+            recipe.tags.remove(*(current - wanted))
+        if wanted - current:
+            recipe.tags.add(*(wanted - current))
+
+    @staticmethod
+    def same_image(current, uploaded):
+        """Загружено то же фото: сравнение по размеру, затем по хэшу"""
+        try:
+            if not current or current.size != uploaded.size:
+                return False
+            digests = []
+            for file in (current, uploaded):
+                digest = hashlib.sha256()
+                file.open("rb")
+                for chunk in file.chunks():
+                    digest.update(chunk)
+                digests.append(digest.digest())
+        except OSError:
+            return False
+        finally:
+            uploaded.seek(0)
+            if current:
+                current.close()
+        return digests[0] == digests[1]
+
+    @staticmethod
+    def invalidate_caches(recipe):
+        """То же, что сигнал post_save рецепта, без его сохранения"""
+        invalidate_recipes(recipe.pk)
+        ShoppingList.invalidate(
+            *Cart.objects.filter(recipe=recipe).values_list(
+                "user_id", flat=True
             )
-        IngredientAmount.objects.filter(recipe=recipe).delete()
-        IngredientAmount.objects.bulk_create(ingredients_list)
+        )
 
+    @transaction.atomic
     def create(self, validated_data):
         author = self.context.get("request").user
         ingredients = validated_data.pop("ingredients_amount")
@@ -140,20 +218,38 @@ class RecipeCreateSerializer(RecipeSerializer):
         return recipe
 
     def update(self, instance, validated_data):
-        instance.name = validated_data.get("name", instance.name)
-        instance.text = validated_data.get("text", instance.text)
-        instance.image = validated_data.get("image", instance.image)
-        instance.cooking_time = validated_data.get(
-            "cooking_time", instance.cooking_time
+        image = validated_data.get("image")
+        image_changed = image is not None and not self.same_image(
+            instance.image, image
         )
-        tags = validated_data.get("tags")
-        if tags is not None:
-            instance.tags.set(tags)
-        ingredients = validated_data.get("ingredients_amount")
-        if ingredients is not None:
-            IngredientAmount.objects.filter(recipe=instance).delete()
-            self.ingredient_save(instance, ingredients)
-        instance.save()
+        with transaction.atomic():
+            # Разница считается от состояния рецепта в БД под блокировкой,
+            # а не от prefetch: параллельные правки не теряются
+            current = Recipe.objects.select_for_update().get(pk=instance.pk)
+            fields = [
+                field
+                for field in ("name", "text", "cooking_time")
+                if field in validated_data
+                and getattr(current, field) != validated_data[field]
+            ]
+            for field in fields:
+                setattr(instance, field, validated_data[field])
+            if image_changed:
+                instance.image = image
+                fields.append("image")
+            tags = validated_data.get("tags")
+            if tags is not None:
+                self.update_tags(current, tags)
+            ingredients = validated_data.get("ingredients_amount")
+            ingredients_changed = ingredients is not None and (
+                self.update_ingredients(current, ingredients)
+            )
+            if fields:
+                instance.save(update_fields=fields)
+            elif ingredients_changed:
+                transaction.on_commit(
+                    lambda: self.invalidate_caches(instance)
+                )
         return instance
 
     def validate(self, data):
@@ -187,53 +283,20 @@ class RecipeCreateSerializer(RecipeSerializer):
         return RecipeSerializer(instance, context=self.context).data
 
 
-class FavoriteSerializer(serializers.ModelSerializer):
-    """Сериализатор избранных рецептов"""
+class RecipeIdsSerializer(serializers.Serializer):
+    """Список id рецептов для пакетных операций с избранным и корзиной"""
 
-    user = serializers.PrimaryKeyRelatedField(
-        queryset=UserModel.objects.all(), write_only=True
-    )
-    recipe = serializers.PrimaryKeyRelatedField(
-        queryset=Recipe.objects.all(), write_only=True
+    recipes = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        max_length=settings.BULK_RECIPES_LIMIT,
     )
 
-    class Meta:
-        model = Favorite
-        fields = ("user", "recipe")
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Favorite.objects.all(),
-                fields=("user", "recipe"),
-                message="Рецепт уже в избранном",
-            )
-        ]
-
 
 class RecipeMiniSerializer(serializers.ModelSerializer):
     """Мини сериалитор для добавления рецепта в избранное"""
 
-    class Meta:
-        model = Recipe
-        fields = ("id", "name", "image", "cooking_time")
-
-
-class CartSerializer(serializers.ModelSerializer):
-    """Сериализатор корзины покупок"""
-
-    user = serializers.PrimaryKeyRelatedField(
-        queryset=UserModel.objects.all(), write_only=True
-    )
-    recipe = serializers.PrimaryKeyRelatedField(
-        queryset=Recipe.objects.all(), write_only=True
-    )
+    images = RecipeImagesField()
 
     class Meta:
-        model = Cart
-        fields = ("user", "recipe")
-        validators = [
-            UniqueTogetherValidator(
-                queryset=Cart.objects.all(),
-                fields=("user", "recipe"),
-                message="Рецепт уже в корзине",
-            )
-        ]
+        model = Recipe
+        fields = ("id", "name", "image", "images", "cooking_time")
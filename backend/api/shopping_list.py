@@ -0,0 +1,205 @@
+import csv
+import hashlib
+import io
+import json
+from functools import lru_cache
+from pathlib import Path
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Sum
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+from rest_framework import renderers
+
+from recipes.models import IngredientAmount
+
+PDF_FONT_NAME = "ShoppingListFont"
+PDF_MARGIN = 50
+PDF_LINE_HEIGHT = 18
+
+
+class ShoppingList:
+    """Список покупок пользователя по рецептам из корзины"""
+
+    def __init__(self, user):
+        self.user = user
+
+    @property
+    def title(self):
+        return f"Список покупок {self.user}:"
+
+    def get_queryset(self):
+        return (
+            IngredientAmount.objects.filter(recipe__cart__user=self.user)
+            .values(
+                name=F("ingredient__name"),
+                measurement_unit=F("ingredient__measurement_unit"),
+            )
+            .annotate(amount=Sum("amount"))
+            .order_by("name", "measurement_unit")
+        )
+
+    def rows(self):
+        """Строки файла по мере чтения: суммы уже посчитаны в GROUP BY"""
+        for row in self.get_queryset().iterator():
+            yield row["name"], row["amount"], row["measurement_unit"]
+
+    @staticmethod
+    def digest_key(user_id):
+        return f"shopping_list:digest:{user_id}"
+
+    @classmethod
+    def invalidate(cls, *user_ids):
+        """Сбрасывает хэш корзины, вызывается из сигналов"""
+        cache.delete_many([cls.digest_key(user_id) for user_id in user_ids])
+
+    def digest(self):
+        """Хэш всего, что попадает в файл: заголовка и строк корзины"""
+        key = self.digest_key(self.user.pk)
+        digest = cache.get(key)
+        if digest is None:
+            content = IngredientAmount.objects.filter(
+                recipe__cart__user=self.user
+            ).order_by("recipe_id", "ingredient_id").values_list(
+                "recipe_id",
+                "ingredient_id",
+                "amount",
+                "ingredient__name",
+                "ingredient__measurement_unit",
+            )
+            digest = hashlib.sha1(
+                repr((self.title, list(content))).encode()
+            ).hexdigest()
+            cache.set(key, digest, settings.SHOPPING_LIST_CACHE_TIMEOUT)
+        return digest
+
+    def stream(self, renderer):
+        """Отдает файл из кэша либо рендерит и кэширует его по ходу"""
+        key = (
+            f"shopping_list:{self.user.pk}:{self.digest()}:{renderer.format}"
+        )
+        content = cache.get(key)
+        if content is not None:
+            yield content
+            return
+        chunks = []
+        for chunk in renderer.stream(self.title, self.rows()):
+            chunks.append(chunk)
+            yield chunk
+        cache.set(
+            key, b"".join(chunks), settings.SHOPPING_LIST_CACHE_TIMEOUT
+        )
+
+
+class ShoppingListRenderer(renderers.BaseRenderer):
+    """Базовый рендерер списка покупок"""
+
+    charset = "utf-8"
+
+    @property
+    def content_type(self):
+        if self.charset:
+            return f"{self.media_type}; charset={self.charset}"
+        return self.media_type
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        """Ответы DRF (например, ошибки) в формате списка покупок"""
+        if isinstance(data, dict):
+            data = data.get("detail", data)
+        return b"".join(self.stream(str(data), ()))
+
+    def stream(self, title, rows):
+        raise NotImplementedError
+
+
+class ShoppingListTextRenderer(ShoppingListRenderer):
+    media_type = "text/plain"
+    format = "txt"
+
+    def stream(self, title, rows):
+        yield f"{title}\n\n".encode(self.charset)
+        for name, amount, measurement_unit in rows:
+            yield f"{name} {amount} {measurement_unit}\n".encode(self.charset)
+
+
+class ShoppingListCSVRenderer(ShoppingListRenderer):
+    media_type = "text/csv"
+    format = "csv"
+
+    def stream(self, title, rows):
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(("name", "amount", "measurement_unit"))
+        for row in rows:
+            writer.writerow(row)
+            yield buffer.getvalue().encode(self.charset)
+            buffer.seek(0)
+            buffer.truncate()
+        yield buffer.getvalue().encode(self.charset)
+
+
+class ShoppingListJSONRenderer(ShoppingListRenderer):
+    media_type = "application/json"
+    format = "json"
+
+    def stream(self, title, rows):
+        ingredients = [
+            {
+                "name": name,
+                "amount": amount,
+                "measurement_unit": measurement_unit,
+            }
+            for name, amount, measurement_unit in rows
+        ]
+        yield json.dumps(
+            {"title": title, "ingredients": ingredients}, ensure_ascii=False
+        ).encode(self.charset)
+
+
+@lru_cache(maxsize=None)
+def get_pdf_font():
+    """Шрифт с кириллицей, если он есть в системе"""
+    font_path = Path(settings.SHOPPING_LIST_PDF_FONT)
+    if not font_path.is_file():
+        return "Helvetica"
+    pdfmetrics.registerFont(TTFont(PDF_FONT_NAME, str(font_path)))
+    return PDF_FONT_NAME
+
+
+class ShoppingListPDFRenderer(ShoppingListRenderer):
+    media_type = "application/pdf"
+    format = "pdf"
+    charset = None
+
+    def stream(self, title, rows):
+        font = get_pdf_font()
+        buffer = io.BytesIO()
+        pdf = canvas.Canvas(buffer, pagesize=A4)
+        width, height = A4
+        y = height - PDF_MARGIN
+        pdf.setFont(font, 14)
+        pdf.drawString(PDF_MARGIN, y, title)
+        y -= PDF_LINE_HEIGHT * 2
+        pdf.setFont(font, 11)
+        for name, amount, measurement_unit in rows:
+            if y < PDF_MARGIN:
+                pdf.showPage()
+                pdf.setFont(font, 11)
+                y = height - PDF_MARGIN
+            pdf.drawString(
+                PDF_MARGIN, y, f"{name} {amount} {measurement_unit}"
+            )
+            y -= PDF_LINE_HEIGHT
+        pdf.save()
+        yield buffer.getvalue()
+
+
+SHOPPING_LIST_RENDERERS = (
+    ShoppingListTextRenderer,
+    ShoppingListCSVRenderer,
+    ShoppingListJSONRenderer,
+    ShoppingListPDFRenderer,
+)
@@ -0,0 +1,81 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from recipes.models import Cart, Ingredient, IngredientAmount, Recipe, Tag
+from .cache import invalidate_recipes
+from .catalog import bump_catalog_version
+from .shopping_list import ShoppingList
+
+UserModel = get_user_model()
+
+
+@receiver((post_save, post_delete), sender=Cart)
+def invalidate_cart_shopping_list(sender, instance, **kwargs):
+    ShoppingList.invalidate(instance.user_id)
+
+
+@receiver((post_save, post_delete), sender=IngredientAmount)
+@receiver(post_save, sender=Recipe)
+def invalidate_recipe_shopping_lists(sender, instance, **kwargs):
+    recipe_id = getattr(instance, "recipe_id", instance.pk)
+    ShoppingList.invalidate(
+        *Cart.objects.filter(recipe_id=recipe_id).values_list(
+            "user_id", flat=True
+        )
+    )
+
+
+@receiver(post_save, sender=Ingredient)
+def invalidate_ingredient_shopping_lists(sender, instance, **kwargs):
+    ShoppingList.invalidate(
+        *Cart.objects.filter(
+            recipe__ingredients_amount__ingredient=instance
+        ).values_list("user_id", flat=True).distinct()
+    )
+
+
+@receiver(post_save, sender=UserModel)
+def invalidate_user_shopping_list(sender, instance, update_fields=None,
+                                  **kwargs):
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    ShoppingList.invalidate(instance.pk)
+
+
+@receiver((post_save, post_delete), sender=Ingredient)
+@receiver((post_save, post_delete), sender=Tag)
+def bump_catalog_version_on_change(sender, **kwargs):
+    bump_catalog_version(sender)
+    bump_catalog_version(Recipe)
+
+
+@receiver((post_save, post_delete), sender=IngredientAmount)
+def invalidate_feed_ingredients(sender, instance, **kwargs):
+    invalidate_recipes(instance.recipe_id)
+
+
+@receiver(post_save, sender=Recipe)
+def invalidate_feed_recipe(sender, instance, created, **kwargs):
+    if created:
+        bump_catalog_version(Recipe)
+    else:
+        invalidate_recipes(instance.pk)
+
+
+@receiver(post_delete, sender=Recipe)
+def invalidate_feed_on_delete(sender, **kwargs):
+    bump_catalog_version(Recipe)
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_feed_tags(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        bump_catalog_version(Recipe)
+
+
+@receiver(post_save, sender=UserModel)
+def invalidate_feed_author(sender, instance, update_fields=None, **kwargs):
+    if update_fields and set(update_fields) <= {"last_login"}:
+        return
+    invalidate_recipes(*instance.recipes.values_list("pk", flat=True))
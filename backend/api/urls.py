@@ -1,7 +1,7 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import IngredientViewSet, RecipeViewSet, TagViewSet
+from .views import IngredientViewSet, MetricsView, RecipeViewSet, TagViewSet
 
 router_v1 = DefaultRouter()
 
@@ -10,5 +10,6 @@ router_v1.register("recipes", RecipeViewSet, basename="recipes")
 router_v1.register("tags", TagViewSet, basename="tags")
 
 urlpatterns = [
+    path("metrics/", MetricsView.as_view(), name="metrics"),
     path("", include(router_v1.urls)),
 ]
@@ -1,45 +1,73 @@
-from django.db.models import F, Sum
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
+from rest_framework.parsers import FormParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from recipes.models import (
     Cart,
     Favorite,
     Ingredient,
-    IngredientAmount,
     Recipe,
     Tag
 )
+from recipes.user_recipes import (
+    CREATED,
+    DELETED,
+    NOT_FOUND,
+    add_recipes,
+    insert_recipes,
+    remove_recipes
+)
+from .async_views import AsyncReadMixin
+from .cache import CatalogCacheMixin, RecipeFeedCacheMixin
+from .fast_serializers import FastRecipeListSerializer
 from .filters import RecipeFilterSet
-from .paginator import LimitedPagination
-from .permissions import AdminOrReadOnly, AuthorOrAdminOrReadOnly
+from .metrics import SerializerTimingMixin, registry
+from .paginator import RecipePagination
+from .parsers import LimitedJSONParser
+from .permissions import AdminOnly, AdminOrReadOnly, AuthorOrAdminOrReadOnly
+from .search import get_ingredient_search
 from .serializers import (
-    CartSerializer,
-    FavoriteSerializer,
     IngredientSerializer,
     RecipeCreateSerializer,
+    RecipeIdsSerializer,
     RecipeMiniSerializer,
     RecipeSerializer,
     TagSerializer
 )
+from .shopping_list import SHOPPING_LIST_RENDERERS, ShoppingList
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class IngredientViewSet(
+    AsyncReadMixin,
+    CatalogCacheMixin,
+    SerializerTimingMixin,
+    viewsets.ReadOnlyModelViewSet,
+):
     """Вьюсет для ингридиента"""
 
+    catalog_model = Ingredient
     serializer_class = IngredientSerializer
     permission_classes = (AdminOrReadOnly,)
     pagination_class = None
 
+    def get_cache_params(self):
+        if self.action != "list":
+            return []
+        # Поиск не зависит от регистра в обеих реализациях
+        return [self.request.query_params.get("name", "").casefold()]
+
     def get_queryset(self):
-        query = self.request.query_params.get('name', '')
-        queryset = Ingredient.objects.filter(name__icontains=query)
-        return queryset
+        query = self.request.query_params.get("name")
+        if self.action == "list" and query:
+            return get_ingredient_search().search(query)
+        return Ingredient.objects.all()
 
 
 class TagBaseViewSet(
@@ -48,22 +76,31 @@ class TagBaseViewSet(
     """Базовый вьюсет для работы с Тэгами"""
 
 
-class TagViewSet(TagBaseViewSet):
+class TagViewSet(
+    AsyncReadMixin, CatalogCacheMixin, SerializerTimingMixin, TagBaseViewSet
+):
     """Вьюсет для работы с Тэгами"""
 
+    catalog_model = Tag
     queryset = Tag.objects.all()
     serializer_class = TagSerializer
     permission_classes = (AdminOrReadOnly,)
     pagination_class = None
 
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(
+    AsyncReadMixin,
+    RecipeFeedCacheMixin,
+    SerializerTimingMixin,
+    viewsets.ModelViewSet,
+):
     """Вьюсет для работы с рецептами"""
 
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     permission_classes = (AuthorOrAdminOrReadOnly,)
-    pagination_class = LimitedPagination
+    pagination_class = RecipePagination
+    parser_classes = (LimitedJSONParser, FormParser, MultiPartParser)
     filter_backends = (DjangoFilterBackend,)
     filter_class = RecipeFilterSet
     filterset_class = RecipeFilterSet
@@ -73,11 +110,52 @@ class RecipeViewSet(viewsets.ModelViewSet):
             return RecipeCreateSerializer
         if self.action in ("favorite", "shopping_cart"):
             return RecipeMiniSerializer
+        if self.action in ("favorite_bulk", "shopping_cart_bulk"):
+            return RecipeIdsSerializer
+        if self.action == "list" and settings.FAST_READ_SERIALIZERS:
+            return FastRecipeListSerializer
         return RecipeSerializer
 
     def get_queryset(self):
-        user_id = self.request.user.pk
-        return Recipe.objects.add_annotations(user_id)
+        queryset = Recipe.objects.for_feed(self.request.user)
+        if self.action == "list" and settings.FAST_READ_SERIALIZERS:
+            return FastRecipeListSerializer.get_rows(queryset)
+        return queryset
+
+    def add_recipe(self, model, pk):
+        """Идемпотентное добавление: 201 при вставке, 200 если уже есть"""
+        if not pk.isdigit():
+            raise Http404
+        recipe = get_object_or_404(
+            Recipe.objects.only(
+                "name", "image", "renditions", "cooking_time"
+            ),
+            pk=pk,
+        )
+        created = insert_recipes(model, self.request.user, [recipe.pk])
+        if model is Cart and created:
+            ShoppingList.invalidate(self.request.user.pk)
+        serializer = self.get_serializer(recipe)
+        return Response(
+            serializer.data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK,
+        )
+
+    def remove_recipe(self, model, pk):
+        """Идемпотентное удаление одним DELETE ... RETURNING.
+
+        Рецепт запрашивается, только если удалять было нечего.
+        """
+        if not pk.isdigit():
+            raise Http404
+        removed = remove_recipes(model, self.request.user, [int(pk)])
+        if not removed:
+            get_object_or_404(Recipe.objects.only("pk"), pk=pk)
+        elif model is Cart:
+            ShoppingList.invalidate(self.request.user.pk)
+        return Response(
+            "Рецепт успешно удален", status=status.HTTP_204_NO_CONTENT
+        )
 
     @action(
         detail=True,
@@ -87,21 +165,11 @@ class RecipeViewSet(viewsets.ModelViewSet):
         ],
     )
     def favorite(self, request, pk):
-        recipe = get_object_or_404(Recipe, pk=pk)
-        data = {"user": request.user.pk, "recipe": recipe.pk}
-        serializer = FavoriteSerializer(data=data)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        serializer = self.get_serializer(recipe)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return self.add_recipe(Favorite, pk)
 
     @favorite.mapping.delete
     def favorite_delete(self, request, pk):
-        recipe = get_object_or_404(Recipe, pk=pk)
-        Favorite.objects.filter(user=request.user, recipe=recipe).delete()
-        return Response(
-            "Рецепт успешно удален", status=status.HTTP_204_NO_CONTENT
-        )
+        return self.remove_recipe(Favorite, pk)
 
     @action(
         detail=True,
@@ -111,66 +179,88 @@ class RecipeViewSet(viewsets.ModelViewSet):
         ],
     )
     def shopping_cart(self, request, pk):
-        recipe = get_object_or_404(Recipe, pk=pk)
-        data = {"user": request.user.pk, "recipe": recipe.pk}
-        serializer = CartSerializer(data=data)
-        serializer.is_valid(raise_exception=True)
-        serializer.save()
-        serializer = self.get_serializer(recipe)
-        return Response(serializer.data, status=status.HTTP_201_CREATED)
+        return self.add_recipe(Cart, pk)
 
     @shopping_cart.mapping.delete
     def cart_delete(self, request, pk):
-        recipe = get_object_or_404(Recipe, pk=pk)
-        Cart.objects.filter(user=request.user, recipe=recipe).delete()
+        return self.remove_recipe(Cart, pk)
+
+    def change_recipes_bulk(self, model, request):
+        """Пакетное добавление и удаление рецептов списка пользователя.
+
+        POST добавляет рецепты из "recipes", DELETE удаляет их, а без
+        "recipes" в теле очищает весь список.
+        """
+        recipe_ids = None
+        if request.method == "POST" or "recipes" in request.data:
+            serializer = self.get_serializer(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            recipe_ids = serializer.validated_data["recipes"]
+        if request.method == "POST":
+            results = add_recipes(model, request.user, recipe_ids)
+            changed = any(result == CREATED for _, result in results)
+        else:
+            removed = remove_recipes(model, request.user, recipe_ids)
+            changed = bool(removed)
+            if recipe_ids is None:
+                recipe_ids = removed
+            removed = set(removed)
+            results = [
+                (pk, DELETED if pk in removed else NOT_FOUND)
+                for pk in dict.fromkeys(recipe_ids)
+            ]
+        if model is Cart and changed:
+            ShoppingList.invalidate(request.user.pk)
         return Response(
-            "Рецепт успешно удален", status=status.HTTP_204_NO_CONTENT
+            {
+                "recipes": [
+                    {"id": pk, "status": result} for pk, result in results
+                ]
+            }
         )
 
     @action(
-        detail=False, methods=["GET"], permission_classes=[IsAuthenticated]
+        detail=False,
+        methods=["POST", "DELETE"],
+        url_path="favorite",
+        permission_classes=[IsAuthenticated],
+    )
+    def favorite_bulk(self, request):
+        return self.change_recipes_bulk(Favorite, request)
+
+    @action(
+        detail=False,
+        methods=["POST", "DELETE"],
+        url_path="shopping_cart",
+        permission_classes=[IsAuthenticated],
+    )
+    def shopping_cart_bulk(self, request):
+        return self.change_recipes_bulk(Cart, request)
+
+    @action(
+        detail=False,
+        methods=["GET"],
+        permission_classes=[IsAuthenticated],
+        renderer_classes=SHOPPING_LIST_RENDERERS,
     )
     def download_shopping_cart(self, request):
-        ingredients = (
-            IngredientAmount.objects.filter(recipe__cart__user=request.user)
-            .values(
-                name=F("ingredient__name"),
-                measurement_unit=F("ingredient__measurement_unit"),
-            )
-            .annotate(amount=Sum("amount"))
+        """Список покупок в формате txt, csv, json или pdf (?format=)"""
+        renderer = request.accepted_renderer
+        shopping_list = ShoppingList(request.user)
+        filename = f"{request.user.username}_shopping_list.{renderer.format}"
+        response = StreamingHttpResponse(
+            shopping_list.stream(renderer), content_type=renderer.content_type
+        )
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+class MetricsView(APIView):
+    """Метрики запросов к API в формате Prometheus"""
+
+    permission_classes = (AdminOnly,)
+
+    def get(self, request):
+        return HttpResponse(
+            registry.render(), content_type="text/plain; version=0.0.4"
         )
-        shopping_list = []
-        for ingr in ingredients:
-            if ingr["name"] in [item.split(" ")[0] for item in shopping_list]:
-                for item in shopping_list:
-                    if item.split(" ")[0] == ingr["name"]:
-                        parts = item.split(" ")
-                        existing_amount = int(parts[1])
-                        new_amount = int(ingr["amount"])
-                        updated_amount = existing_amount + new_amount
-                        parts[1] = str(updated_amount)
-                        updated_item = " ".join(parts)
-                        shopping_list.remove(item)
-                        shopping_list.append(updated_item)
-                        break
-            else:
-                shopping_list.append(
-                    f'{ingr["name"]} '
-                    f'{ingr["amount"]} '
-                    f'{ingr["measurement_unit"]}'
-                )
-        if shopping_list:
-            shopping_list_text = (
-                f"Список покупок {self.request.user}:\n\n"
-                + "\n".join(shopping_list)
-            )
-            filename = f"{self.request.user.username}_shopping_list.txt"
-            with open(filename, "w", encoding="utf-8") as file:
-                file.write(shopping_list_text)
-            response = HttpResponse(
-                open(filename, "rb").read(), content_type="text/plain"
-            )
-            response[
-                "Content-Disposition"
-            ] = f'attachment; filename="{filename}"'
-            return response
@@ -0,0 +1,130 @@
+import threading
+import time
+
+import psycopg2
+import psycopg2.extras
+from django.db.backends.postgresql import base
+from psycopg2 import pool
+
+from api.metrics import registry
+
+
+class ConnectionPool:
+    """Пул соединений psycopg2 с ожиданием свободного соединения"""
+
+    def __init__(self, alias, conn_params, size, timeout, health_checks):
+        self.alias = alias
+        self.pool = pool.ThreadedConnectionPool(0, size, **conn_params)
+        self.slots = threading.BoundedSemaphore(size)
+        self.timeout = timeout
+        self.health_checks = health_checks
+
+    def getconn(self):
+        start = time.perf_counter()
+        acquired = self.slots.acquire(timeout=self.timeout)
+        registry.record_pool_checkout(
+            self.alias, time.perf_counter() - start, acquired
+        )
+        if not acquired:
+            raise psycopg2.OperationalError(
+                f"Нет свободных соединений в пуле за {self.timeout} с"
+            )
+        try:
+            return self.take()
+        except Exception:
+            self.slots.release()
+            raise
+
+    def take(self):
+        connection = self.pool.getconn()
+        if connection.closed or (
+            self.health_checks and not self.is_usable(connection)
+        ):
+            self.pool.putconn(connection, close=True)
+            connection = self.pool.getconn()
+        return connection
+
+    def is_usable(self, connection):
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT 1")
+            connection.rollback()
+        except psycopg2.Error:
+            return False
+        return True
+
+    def putconn(self, connection):
+        try:
+            self.pool.putconn(connection, close=bool(connection.closed))
+        finally:
+            self.slots.release()
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    """PostgreSQL с проверкой постоянных соединений и необязательным пулом"""
+
+    pools = {}
+    pools_lock = threading.Lock()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.health_check_needed = False
+
+    @property
+    def health_checks(self):
+        return self.settings_dict.get("CONN_HEALTH_CHECKS", False)
+
+    def get_connection_pool(self, conn_params):
+        size = self.settings_dict.get("POOL", {}).get("SIZE", 0)
+        if not size:
+            return None
+        with self.pools_lock:
+            if self.alias not in self.pools:
+                self.pools[self.alias] = ConnectionPool(
+                    self.alias,
+                    conn_params,
+                    size,
+                    self.settings_dict["POOL"].get("TIMEOUT", 5),
+                    self.health_checks,
+                )
+            return self.pools[self.alias]
+
+    def get_new_connection(self, conn_params):
+        connection_pool = self.get_connection_pool(conn_params)
+        if connection_pool is None:
+            registry.increment(
+                "foodgram_db_connections_opened_total", self.alias
+            )
+            return super().get_new_connection(conn_params)
+        connection = connection_pool.getconn()
+        options = self.settings_dict["OPTIONS"]
+        self.isolation_level = options.get(
+            "isolation_level", connection.isolation_level
+        )
+        if self.isolation_level != connection.isolation_level:
+            connection.set_session(isolation_level=self.isolation_level)
+        psycopg2.extras.register_default_jsonb(
+            conn_or_curs=connection, loads=lambda x: x
+        )
+        return connection
+
+    def _close(self):
+        connection_pool = self.pools.get(self.alias)
+        if self.connection is None or connection_pool is None:
+            return super()._close()
+        with self.wrap_database_errors:
+            return connection_pool.putconn(self.connection)
+
+    def close_if_unusable_or_obsolete(self):
+        super().close_if_unusable_or_obsolete()
+        # Постоянное соединение проверяется при первом обращении в запросе
+        self.health_check_needed = (
+            self.connection is not None and self.health_checks
+        )
+
+    def ensure_connection(self):
+        if self.health_check_needed:
+            self.health_check_needed = False
+            if self.connection is not None and not self.is_usable():
+                self.close()
+        super().ensure_connection()
@@ -32,6 +32,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "api.middleware.RequestMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -60,16 +61,32 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "foodgram_backend.wsgi.application"
+ASGI_APPLICATION = "foodgram_backend.asgi.application"
 
+SERVER_INTERFACE = os.getenv("SERVER_INTERFACE", "wsgi")
+ASYNC_READ_VIEWS = SERVER_INTERFACE == "asgi"
+
+
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", 0))
 
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql",
+        "ENGINE": "foodgram_backend.db",
         "NAME": os.getenv("POSTGRES_DB", "foodgram"),
         "USER": os.getenv("POSTGRES_USER", "foodgram_user"),
         "PASSWORD": os.getenv("POSTGRES_PASSWORD", ""),
         "HOST": os.getenv("DB_HOST", ""),
         "PORT": os.getenv("DB_PORT", 5432),
+        "CONN_MAX_AGE": int(
+            os.getenv("DB_CONN_MAX_AGE", 0 if DB_POOL_SIZE else 60)
+        ),
+        "CONN_HEALTH_CHECKS": (
+            os.getenv("DB_CONN_HEALTH_CHECKS", "True") == "True"
+        ),
+        "POOL": {
+            "SIZE": DB_POOL_SIZE,
+            "TIMEOUT": float(os.getenv("DB_POOL_TIMEOUT", 5)),
+        },
     }
 }
 
@@ -109,6 +126,70 @@ MEDIA_ROOT = BASE_DIR / "media"
 
 CSV_DIR = BASE_DIR / "data"
 
+RECIPE_IMAGE_RENDITIONS = {
+    "thumbnail": (160, 160),
+    "card": (640, 640),
+    "full": (1600, 1600),
+}
+RECIPE_IMAGE_QUALITY = int(os.getenv("RECIPE_IMAGE_QUALITY", 80))
+RECIPE_IMAGE_WORKERS = int(os.getenv("RECIPE_IMAGE_WORKERS", 2))
+RECIPE_IMAGE_MAX_BYTES = int(
+    os.getenv("RECIPE_IMAGE_MAX_BYTES", 10 * 1024 * 1024)
+)
+RECIPE_IMAGE_MAX_PIXELS = int(os.getenv("RECIPE_IMAGE_MAX_PIXELS", 40_000_000))
+RECIPE_IMAGE_SPOOL_SIZE = int(os.getenv("RECIPE_IMAGE_SPOOL_SIZE", 1024 * 1024))
+RECIPE_REQUEST_MAX_BYTES = int(
+    os.getenv(
+        "RECIPE_REQUEST_MAX_BYTES",
+        RECIPE_IMAGE_MAX_BYTES * 4 // 3 + 1024 * 1024,
+    )
+)
+
+REQUEST_METRICS_PATHS = ("/api/",)
+REQUEST_QUERY_BUDGET = int(os.getenv("REQUEST_QUERY_BUDGET", 20))
+
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND",
+            "django.core.cache.backends.filebased.FileBasedCache",
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", str(BASE_DIR / "cache")),
+    }
+}
+
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", 60 * 60 * 24))
+CATALOG_CACHE_MAX_AGE = int(os.getenv("CATALOG_CACHE_MAX_AGE", 60))
+
+PAGINATION_COUNT_STRATEGY = os.getenv(
+    "PAGINATION_COUNT_STRATEGY", "api.paginator.ExactCount"
+)
+PAGINATION_COUNT_CACHE_TIMEOUT = int(
+    os.getenv("PAGINATION_COUNT_CACHE_TIMEOUT", 60)
+)
+PAGINATION_COUNT_ESTIMATE_THRESHOLD = int(
+    os.getenv("PAGINATION_COUNT_ESTIMATE_THRESHOLD", 10_000)
+)
+
+FEED_CACHE_TIMEOUT = int(os.getenv("FEED_CACHE_TIMEOUT", 60 * 5))
+
+FAST_READ_SERIALIZERS = os.getenv("FAST_READ_SERIALIZERS", "True") == "True"
+
+INGREDIENT_SEARCH_BACKEND = os.getenv(
+    "INGREDIENT_SEARCH_BACKEND", "api.search.IngredientSearch"
+)
+INGREDIENT_SEARCH_LIMIT = int(os.getenv("INGREDIENT_SEARCH_LIMIT", 50))
+
+BULK_RECIPES_LIMIT = int(os.getenv("BULK_RECIPES_LIMIT", 100))
+
+SHOPPING_LIST_CACHE_TIMEOUT = int(
+    os.getenv("SHOPPING_LIST_CACHE_TIMEOUT", 60 * 60 * 24)
+)
+SHOPPING_LIST_PDF_FONT = os.getenv(
+    "SHOPPING_LIST_PDF_FONT",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+)
+
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 REST_FRAMEWORK = {
@@ -118,6 +199,10 @@ REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [
         "rest_framework.authentication.TokenAuthentication",
     ],
+    "DEFAULT_RENDERER_CLASSES": [
+        os.getenv("JSON_RENDERER", "api.renderers.FastJSONRenderer"),
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ],
     "DEFAULT_PAGINATION_CLASS": "api.paginator.LimitedPagination",
     "PAGE_SIZE": 6,
 }
@@ -0,0 +1,14 @@
+import os
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", 1))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# SERVER_INTERFACE=asgi: uvicorn-воркеры и асинхронные маршруты чтения,
+# размер пула потоков для view задается ASGI_THREADS.
+if os.getenv("SERVER_INTERFACE", "wsgi") == "asgi":
+    worker_class = "uvicorn.workers.UvicornWorker"
+    wsgi_app = "foodgram_backend.asgi:application"
+else:
+    wsgi_app = "foodgram_backend.wsgi:application"
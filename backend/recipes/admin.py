@@ -30,7 +30,9 @@ class TagAdmin(admin.ModelAdmin):
 
 @admin.register(Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ("author", "name", "cooking_time")
+    list_display = (
+        "author", "name", "cooking_time", "favorites_count", "carts_count"
+    )
     search_fields = ("name", "author", "tags")
     list_filter = ("name", "author", "tags")
     inlines = (IngredientAmountInline,)
@@ -0,0 +1,73 @@
+from collections import Counter, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce, Greatest
+
+from users.models import Follow
+from .models import Cart, Favorite, Recipe
+
+UserModel = get_user_model()
+
+# Модель-источник: (модель со счетчиком, поле связи, поле счетчика)
+COUNTERS = {
+    Favorite: ((Recipe, "recipe", "favorites_count"),),
+    Cart: ((Recipe, "recipe", "carts_count"),),
+    Recipe: ((UserModel, "author", "recipes_count"),),
+    Follow: (
+        (UserModel, "author", "followers_count"),
+        (UserModel, "user", "subscriptions_count"),
+    ),
+}
+
+
+def change_counters(instance, delta):
+    """Атомарно меняет счетчики, связанные с объектом, на delta"""
+    for model, relation, field in COUNTERS[type(instance)]:
+        model.objects.filter(
+            pk=getattr(instance, f"{relation}_id")
+        ).update(**{field: Greatest(F(field) + delta, 0)})
+
+
+def change_counters_many(source, related_ids, delta):
+    """Счетчики для пачки объектов source, созданных в обход сигналов.
+
+    related_ids: id связанных объектов по полю связи, например
+    {"recipe": [1, 2]}; один UPDATE на каждую кратность изменения.
+    """
+    for model, relation, field in COUNTERS[source]:
+        groups = defaultdict(list)
+        for pk, times in Counter(related_ids.get(relation, ())).items():
+            groups[times].append(pk)
+        for times, pks in groups.items():
+            model.objects.filter(pk__in=pks).update(
+                **{field: Greatest(F(field) + delta * times, 0)}
+            )
+
+
+def actual_count(source, relation):
+    return Coalesce(
+        Subquery(
+            source.objects.filter(**{relation: OuterRef("pk")})
+            .order_by()
+            .values(relation)
+            .annotate(total=Count("pk"))
+            .values("total")
+        ),
+        0,
+    )
+
+
+def reconcile_counters():
+    """Пересчитывает разошедшиеся счетчики, возвращает число исправлений"""
+    fixed = {}
+    for source, counters in COUNTERS.items():
+        for model, relation, field in counters:
+            actual = actual_count(source, relation)
+            drifted = model.objects.annotate(actual=actual).exclude(
+                **{field: F("actual")}
+            )
+            fixed[f"{model.__name__}.{field}"] = model.objects.filter(
+                pk__in=drifted.values("pk")
+            ).update(**{field: actual})
+    return fixed
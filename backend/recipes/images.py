@@ -0,0 +1,139 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from pathlib import PurePosixPath
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connections, transaction
+from PIL import Image, ImageOps
+
+from api.cache import invalidate_recipes
+from .models import Recipe
+
+logger = logging.getLogger(__name__)
+
+RENDITIONS_DIR = "recipes/renditions"
+
+RENDITION_FORMATS = {
+    "jpeg": ("JPEG", "jpg", {"optimize": True, "progressive": True}),
+    "webp": ("WEBP", "webp", {"method": 4}),
+}
+
+executor = None
+
+
+def needs_renditions(recipe):
+    """Копии отсутствуют или построены для другого фото"""
+    return bool(recipe.image) and (
+        recipe.renditions.get("source") != recipe.image.name
+    )
+
+
+def rendition_files(renditions):
+    return {
+        path
+        for formats in renditions.get("images", {}).values()
+        for path in formats.values()
+    }
+
+
+def open_image(name):
+    with default_storage.open(name) as file:
+        image = Image.open(file)
+        image = ImageOps.exif_transpose(image)
+        image.load()
+    return image
+
+
+def encode(image, image_format):
+    pil_format, _, options = RENDITION_FORMATS[image_format]
+    if pil_format == "JPEG" and image.mode != "RGB":
+        background = Image.new("RGB", image.size, "white")
+        rgba = image.convert("RGBA")
+        background.paste(rgba, mask=rgba.getchannel("A"))
+        image = background
+    elif image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA")
+    buffer = BytesIO()
+    image.save(
+        buffer,
+        pil_format,
+        quality=settings.RECIPE_IMAGE_QUALITY,
+        **options,
+    )
+    return buffer.getvalue()
+
+
+def build_renditions(recipe_id):
+    """Строит уменьшенные копии фото рецепта в JPEG и WebP"""
+    recipe = (
+        Recipe.objects.filter(pk=recipe_id)
+        .only("image", "renditions")
+        .first()
+    )
+    if recipe is None or not recipe.image:
+        return False
+    source = recipe.image.name
+    original = open_image(source)
+    prefix = f"{RENDITIONS_DIR}/{recipe_id}/{PurePosixPath(source).stem}"
+    images = {}
+    for rendition, size in settings.RECIPE_IMAGE_RENDITIONS.items():
+        resized = original.copy()
+        resized.thumbnail(size, Image.LANCZOS)
+        images[rendition] = {}
+        for image_format, (_, extension, _) in RENDITION_FORMATS.items():
+            images[rendition][image_format] = default_storage.save(
+                f"{prefix}_{rendition}.{extension}",
+                ContentFile(encode(resized, image_format)),
+            )
+    renditions = {"source": source, "images": images}
+    updated = Recipe.objects.filter(pk=recipe_id, image=source).update(
+        renditions=renditions
+    )
+    if not updated:
+        # Фото сменилось, пока строились копии: их заменит новая задача
+        stale = rendition_files(renditions)
+    else:
+        stale = rendition_files(recipe.renditions) - rendition_files(
+            renditions
+        )
+        invalidate_recipes(recipe_id)
+    for path in stale:
+        default_storage.delete(path)
+    return bool(updated)
+
+
+def run_task(recipe_id):
+    try:
+        build_renditions(recipe_id)
+    except Exception:
+        logger.exception("Не удалось обработать фото рецепта %s", recipe_id)
+
+
+def run_in_worker(recipe_id):
+    try:
+        run_task(recipe_id)
+    finally:
+        connections.close_all()
+
+
+def get_executor():
+    global executor
+    if executor is None:
+        executor = ThreadPoolExecutor(
+            max_workers=settings.RECIPE_IMAGE_WORKERS,
+            thread_name_prefix="recipe-images",
+        )
+    return executor
+
+
+def schedule_renditions(recipe_id):
+    """Ставит обработку фото в очередь после фиксации транзакции"""
+    if not settings.RECIPE_IMAGE_WORKERS:
+        transaction.on_commit(lambda: run_task(recipe_id))
+        return
+    transaction.on_commit(
+        lambda: get_executor().submit(run_in_worker, recipe_id)
+    )
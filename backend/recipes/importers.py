@@ -0,0 +1,478 @@
+import csv
+import json
+import time
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+
+from django.db import (
+    DEFAULT_DB_ALIAS,
+    connection,
+    connections,
+    transaction
+)
+
+from api.catalog import bump_catalog_version
+from .models import Ingredient, Recipe, Tag
+
+JSON_READ_SIZE = 64 * 1024
+# Номер строки файла во временной таблице COPY
+LOAD_SEQUENCE = "load_seq"
+
+# Модель справочника и поля, по которым строка файла совпадает с записью
+CATALOGS = {
+    "ingredients": (Ingredient, ("name", "measurement_unit")),
+    "tags": (Tag, ("slug",)),
+}
+
+
+def read_csv(path):
+    with open(path, mode="r", encoding="utf-8", newline="") as csv_file:
+        yield from csv.DictReader(csv_file)
+
+
+def read_json(path):
+    """Потоково читает JSON-массив объектов, не загружая файл целиком"""
+    decoder = json.JSONDecoder()
+    with open(path, mode="r", encoding="utf-8") as json_file:
+        buffer = json_file.read(JSON_READ_SIZE).lstrip()
+        if not buffer.startswith("["):
+            raise ValueError(f"{path}: ожидается JSON-массив")
+        buffer = buffer[1:]
+        while True:
+            buffer = buffer.lstrip().lstrip(",").lstrip()
+            if buffer.startswith("]"):
+                return
+            try:
+                row, end = decoder.raw_decode(buffer)
+            except json.JSONDecodeError:
+                chunk = json_file.read(JSON_READ_SIZE)
+                if not chunk:
+                    raise
+                buffer += chunk
+                continue
+            if not isinstance(row, dict):
+                raise ValueError(f"{path}: элемент массива не объект")
+            yield row
+            buffer = buffer[end:]
+
+
+READERS = {
+    ".csv": read_csv,
+    ".json": read_json,
+}
+
+
+def read_rows(path):
+    reader = READERS.get(Path(path).suffix.lower())
+    if reader is None:
+        raise ValueError(f"{path}: неизвестный формат файла")
+    return reader(path)
+
+
+def chunked(rows, size):
+    rows = iter(rows)
+    while True:
+        batch = list(islice(rows, size))
+        if not batch:
+            return
+        yield batch
+
+
+@dataclass
+class ImportStats:
+    rows: int = 0
+    created: int = 0
+    updated: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+class BulkImporter:
+    """Идемпотентная загрузка пачками через ORM с upsert по ключу.
+
+    Записи не удаляются: новые строки вставляются с ignore_conflicts,
+    у найденных по ключу обновляются только изменившиеся поля.
+    Из повторов ключа в файле берется последняя строка. Строки, значения
+    которых в других уникальных полях уже заняты записью с другим ключом
+    или более ранней строкой файла, пропускаются.
+    Без ключа строки просто добавляются пачками bulk_create.
+    """
+
+    def __init__(self, model, key_fields=(), batch_size=1000, update=True):
+        self.model = model
+        self.key_fields = tuple(key_fields)
+        self.batch_size = batch_size
+        self.fields = [
+            field
+            for field in model._meta.concrete_fields
+            if not field.primary_key
+        ]
+        self.value_fields = [
+            field.attname
+            for field in self.fields
+            if field.attname not in self.key_fields
+        ]
+        self.update_fields = self.value_fields if update else []
+        self.unique_fields = self.get_unique_fields() if key_fields else []
+
+    def get_unique_fields(self):
+        """Наборы уникальных полей модели, кроме ключа и его надмножеств"""
+        meta = self.model._meta
+        candidates = [
+            (field.attname,) for field in self.fields if field.unique
+        ]
+        candidates += [
+            tuple(meta.get_field(name).attname for name in fields)
+            for fields in meta.unique_together
+        ]
+        candidates += [
+            tuple(meta.get_field(name).attname for name in constraint.fields)
+            for constraint in meta.total_unique_constraints
+        ]
+        key = set(self.key_fields)
+        return [
+            fields
+            for fields in dict.fromkeys(candidates)
+            if not key <= set(fields)
+            and not any(
+                set(other) < set(fields) for other in candidates
+            )
+        ]
+
+    def get_key(self, row):
+        return tuple(row[field] for field in self.key_fields)
+
+    def clean(self, row):
+        fields = self.key_fields + tuple(self.value_fields)
+        return {
+            field: row[field].strip() if isinstance(row[field], str)
+            else row[field]
+            for field in fields
+            if field in row
+        }
+
+    def get_existing(self, keys):
+        lookup = f"{self.key_fields[0]}__in"
+        existing = self.model.objects.filter(
+            **{lookup: {key[0] for key in keys}}
+        )
+        objects = {}
+        for obj in existing:
+            key = tuple(getattr(obj, field) for field in self.key_fields)
+            if key in keys:
+                objects[key] = obj
+        return objects
+
+    def get_conflicts(self, rows):
+        """Ключи строк, чьи уникальные значения уже кем-то заняты.
+
+        Сначала отбрасываются строки со значениями записей с другим
+        ключом, из оставшихся значение достается первой строке.
+        """
+        conflicts = set()
+        for fields in self.unique_fields:
+            claimed = {}
+            for key, row in rows.items():
+                if all(field in row for field in fields):
+                    value = tuple(row[field] for field in fields)
+                    claimed.setdefault(value, []).append(key)
+            if not claimed:
+                continue
+            holders = self.model.objects.filter(
+                **{f"{fields[0]}__in": {value[0] for value in claimed}}
+            ).values_list(*fields, *self.key_fields)
+            for values in holders:
+                owner = tuple(values[len(fields):])
+                for key in claimed.get(tuple(values[:len(fields)]), ()):
+                    if key != owner:
+                        conflicts.add(key)
+        taken = set(conflicts)
+        for fields in self.unique_fields:
+            claimed = set()
+            for key, row in rows.items():
+                if key in taken or not all(
+                    field in row for field in fields
+                ):
+                    continue
+                value = tuple(row[field] for field in fields)
+                if value in claimed:
+                    conflicts.add(key)
+                claimed.add(value)
+        return conflicts
+
+    def upsert(self, batch, stats):
+        stats.rows += len(batch)
+        if not self.key_fields:
+            self.model.objects.bulk_create(
+                self.model(**self.clean(row)) for row in batch
+            )
+            stats.created += len(batch)
+            return
+        rows = {}
+        for row in batch:
+            row = self.clean(row)
+            rows[self.get_key(row)] = row
+        for key in self.get_conflicts(rows):
+            del rows[key]
+        existing = self.get_existing(rows)
+        created = []
+        changed = []
+        for key, row in rows.items():
+            obj = existing.get(key)
+            if obj is None:
+                created.append(self.model(**row))
+                continue
+            fields = [
+                field
+                for field in self.update_fields
+                if field in row and getattr(obj, field) != row[field]
+            ]
+            if fields:
+                for field in fields:
+                    setattr(obj, field, row[field])
+                changed.append(obj)
+        self.model.objects.bulk_create(created, ignore_conflicts=True)
+        if changed:
+            self.model.objects.bulk_update(changed, self.update_fields)
+        stats.created += len(created)
+        stats.updated += len(changed)
+
+    def load(self, rows, stats):
+        for batch in chunked(rows, self.batch_size):
+            self.upsert(batch, stats)
+
+    def load_rows(self, rows):
+        """Загрузка без своей транзакции и сброса версий каталога"""
+        stats = ImportStats()
+        start = time.perf_counter()
+        self.load(rows, stats)
+        stats.seconds = time.perf_counter() - start
+        return stats
+
+    def run(self, rows):
+        with transaction.atomic():
+            stats = self.load_rows(rows)
+            if stats.created or stats.updated:
+                transaction.on_commit(self.bump_versions)
+        return stats
+
+    def bump_versions(self):
+        bump_catalog_version(self.model)
+        bump_catalog_version(Recipe)
+
+
+class CopyStream:
+    """Файлоподобный объект для copy_expert поверх генератора строк"""
+
+    def __init__(self, lines):
+        self.lines = lines
+        self.buffer = ""
+
+    def read(self, size=-1):
+        parts = [self.buffer]
+        length = len(self.buffer)
+        for line in self.lines:
+            parts.append(line)
+            length += len(line)
+            if 0 <= size <= length:
+                break
+        data = "".join(parts)
+        if size < 0:
+            size = len(data)
+        self.buffer = data[size:]
+        return data[:size]
+
+
+def encode_copy_value(value):
+    """Значение в текстовом формате COPY"""
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, int):
+        return str(value)
+    return (
+        str(value)
+        .replace("\\", "\\\\")
+        .replace("\t", "\\t")
+        .replace("\n", "\\n")
+        .replace("\r", "\\r")
+    )
+
+
+class CopyImporter(BulkImporter):
+    """Загрузка через COPY FROM STDIN во временную таблицу.
+
+    Строки сливаются в основную таблицу одним INSERT ... SELECT:
+    с ON CONFLICT по ключу, либо без дублей существующих записей.
+    Повторы ключа и конфликты по другим уникальным полям разбираются
+    так же, как в BulkImporter, по номеру строки файла.
+    Работает только на PostgreSQL; генератор строк не должен обращаться
+    к базе, пока идет COPY.
+    """
+
+    def get_default(self, field, instance, db):
+        """Функция, кодирующая значение поля, которого нет в строке.
+
+        auto_now, auto_now_add и вызываемые default вычисляются на каждую
+        строку, как при сохранении модели, остальные - один раз.
+        """
+        if getattr(field, "auto_now", False) or getattr(
+            field, "auto_now_add", False
+        ):
+            def value():
+                return field.pre_save(instance, add=True)
+        elif callable(field.default):
+            value = field.get_default
+        else:
+            encoded = encode_copy_value(
+                field.get_db_prep_save(field.get_default(), db)
+            )
+            return lambda: encoded
+        return lambda: encode_copy_value(field.get_db_prep_save(value(), db))
+
+    def encode_rows(self, rows, stats):
+        # Сам объект соединения, а не прокси: он нужен на каждое значение
+        db = connections[DEFAULT_DB_ALIAS]
+        instance = self.model()
+        columns = [
+            (
+                field.attname,
+                field.get_db_prep_save,
+                self.get_default(field, instance, db),
+            )
+            for field in self.fields
+        ]
+        for row in rows:
+            stats.rows += 1
+            row = self.clean(row)
+            yield "\t".join(
+                encode_copy_value(prepare(row[name], db))
+                if name in row
+                else default()
+                for name, prepare, default in columns
+            ) + "\n"
+
+    def get_merge_sql(self, table, staging):
+        qn = connection.ops.quote_name
+        columns = ", ".join(qn(field.column) for field in self.fields)
+        if not self.key_fields:
+            select = f"SELECT {columns} FROM {staging}"
+            conflict = "ON CONFLICT DO NOTHING"
+        else:
+            keys = [
+                qn(self.model._meta.get_field(name).column)
+                for name in self.key_fields
+            ]
+            key = ", ".join(keys)
+            values = [
+                qn(field.column)
+                for field in self.fields
+                if field.attname in self.update_fields
+            ]
+            sequence = qn(LOAD_SEQUENCE)
+            # Последняя строка для ключа, порядок - по первому его появлению
+            source = (
+                f"SELECT DISTINCT ON ({key}) {columns}, "
+                f"min({sequence}) OVER (PARTITION BY {key}) AS first_seq "
+                f"FROM {staging} ORDER BY {key}, {sequence} DESC"
+            )
+            conditions = []
+            if self.unique_fields:
+                # Строки, чьи уникальные значения заняты записью с другим
+                # ключом, отбрасываются, из оставшихся значение достается
+                # первой строке
+                other_key = ", ".join(f"{table}.{column}" for column in keys)
+                own_key = ", ".join(f"incoming.{column}" for column in keys)
+                taken = []
+                ranks = []
+                for number, fields in enumerate(self.unique_fields):
+                    unique = [
+                        qn(self.model._meta.get_field(name).column)
+                        for name in fields
+                    ]
+                    matches = " AND ".join(
+                        f"{table}.{column} = incoming.{column}"
+                        for column in unique
+                    )
+                    taken.append(
+                        f"NOT EXISTS (SELECT 1 FROM {table} WHERE {matches} "
+                        f"AND ({other_key}) IS DISTINCT FROM ({own_key}))"
+                    )
+                    ranks.append(
+                        f"row_number() OVER (PARTITION BY "
+                        f"{', '.join(unique)} ORDER BY first_seq) "
+                        f"AS rank_{number}"
+                    )
+                    conditions.append(f"rank_{number} = 1")
+                source = (
+                    f"SELECT *, {', '.join(ranks)} FROM (SELECT * "
+                    f"FROM ({source}) AS incoming "
+                    f"WHERE {' AND '.join(taken)}) AS free"
+                )
+            if values:
+                current = ", ".join(f"{table}.{value}" for value in values)
+                excluded = ", ".join(f"EXCLUDED.{value}" for value in values)
+                assignments = ", ".join(
+                    f"{value} = EXCLUDED.{value}" for value in values
+                )
+                conflict = (
+                    f"ON CONFLICT ({key}) "
+                    f"DO UPDATE SET {assignments} "
+                    f"WHERE ({current}) IS DISTINCT FROM ({excluded})"
+                )
+            else:
+                matches = " AND ".join(
+                    f"{table}.{column} = incoming.{column}" for column in keys
+                )
+                conditions.append(
+                    f"NOT EXISTS (SELECT 1 FROM {table} WHERE {matches})"
+                )
+                conflict = "ON CONFLICT DO NOTHING"
+            select = f"SELECT {columns} FROM ({source}) AS incoming"
+            if conditions:
+                select += f" WHERE {' AND '.join(conditions)}"
+        return (
+            f"WITH merged AS (INSERT INTO {table} ({columns}) {select} "
+            f"{conflict} RETURNING xmax = 0 AS inserted) "
+            "SELECT count(*) FILTER (WHERE inserted), "
+            "count(*) FILTER (WHERE NOT inserted) FROM merged"
+        )
+
+    def load(self, rows, stats):
+        qn = connection.ops.quote_name
+        table = qn(self.model._meta.db_table)
+        staging = qn(f"staging_{self.model._meta.db_table}")
+        columns = ", ".join(qn(field.column) for field in self.fields)
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"DROP TABLE IF EXISTS {staging}")
+            cursor.execute(
+                f"CREATE TEMPORARY TABLE {staging} ON COMMIT DROP AS "
+                f"SELECT {columns} FROM {table} WITH NO DATA"
+            )
+            cursor.execute(
+                f"ALTER TABLE {staging} "
+                f"ADD COLUMN {qn(LOAD_SEQUENCE)} bigserial"
+            )
+            cursor.copy_expert(
+                f"COPY {staging} ({columns}) FROM STDIN",
+                CopyStream(self.encode_rows(rows, stats)),
+            )
+            cursor.execute(self.get_merge_sql(table, staging))
+            created, updated = cursor.fetchone()
+            cursor.execute(f"DROP TABLE {staging}")
+        stats.created += created
+        stats.updated += updated
+
+
+def get_importer(model, key_fields=(), batch_size=1000, update=True,
+                 copy=False):
+    """COPY-загрузчик на PostgreSQL, иначе пачки bulk_create"""
+    importer = BulkImporter
+    if copy and connection.vendor == "postgresql":
+        importer = CopyImporter
+    return importer(model, key_fields, batch_size, update)
@@ -0,0 +1,253 @@
+import asyncio
+import json
+import re
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.signals import connection_created
+from django.db.models import Count
+from django.test import AsyncClient, Client, override_settings
+from rest_framework.authtoken.models import Token
+
+from recipes.models import Recipe, Tag
+
+UserModel = get_user_model()
+
+DUMMY_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+}
+
+SERVER_TIMING_QUERIES = re.compile(r'desc="(\d+) q"')
+
+
+class QueryCounter:
+    """Счетчик запросов к БД через execute_wrapper"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class SimulatedLatency:
+    """Задержка перед каждым запросом к БД, как до удаленного сервера"""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+
+    def __call__(self, execute, sql, params, many, context):
+        time.sleep(self.seconds)
+        return execute(sql, params, many, context)
+
+    def install(self, sender=None, connection=None, **kwargs):
+        if self not in connection.execute_wrappers:
+            connection.execute_wrappers.append(self)
+
+
+class Command(BaseCommand):
+    help = "Нагрузочный прогон основных эндпоинтов API внутри процесса"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=100)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument(
+            "--interface",
+            choices=("wsgi", "asgi"),
+            default="wsgi",
+            help="Путь обработки запросов: WSGI или ASGI",
+        )
+        parser.add_argument(
+            "--concurrency",
+            type=int,
+            default=1,
+            help="Число одновременных запросов",
+        )
+        parser.add_argument(
+            "--scenario",
+            action="append",
+            dest="scenarios",
+            help="Запустить только указанные сценарии",
+        )
+        parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            help="Отключить кэш Django на время прогона",
+        )
+        parser.add_argument(
+            "--db-latency",
+            type=float,
+            default=0,
+            help="Добавочная задержка каждого запроса к БД, мс",
+        )
+        parser.add_argument("--output", help="Файл для JSON-отчета")
+
+    def get_user(self):
+        """Пользователь с самой большой корзиной"""
+        user = (
+            UserModel.objects.annotate(carts=Count("cart"))
+            .filter(carts__gt=0)
+            .order_by("-carts")
+            .first()
+        )
+        if user is None:
+            raise CommandError("Нет данных: выполните seed_load")
+        return user
+
+    def get_scenarios(self):
+        recipe = Recipe.objects.first()
+        tag = Tag.objects.first()
+        return {
+            "feed": "/api/recipes/",
+            "filtered_feed": f"/api/recipes/?tags={tag.slug}&is_favorited=1",
+            "recipe_detail": f"/api/recipes/{recipe.pk}/",
+            "subscriptions": "/api/users/subscriptions/",
+            "shopping_list": "/api/recipes/download_shopping_cart/",
+            "ingredient_search": "/api/ingredients/?name=сыр",
+        }
+
+    def run_scenario(self, url, options):
+        if options["interface"] == "asgi":
+            samples, elapsed = asyncio.run(self.run_asgi(url, options))
+        else:
+            samples, elapsed = self.run_wsgi(url, options)
+        timings = [timing for timing, _ in samples]
+        queries = [count for _, count in samples if count is not None]
+        percentiles = statistics.quantiles(timings, n=100)
+        return {
+            "url": url,
+            "requests": len(samples),
+            "p50_ms": round(percentiles[49], 3),
+            "p95_ms": round(percentiles[94], 3),
+            "p99_ms": round(percentiles[98], 3),
+            "queries_per_request": (
+                round(statistics.mean(queries), 2) if queries else None
+            ),
+            "throughput_rps": round(len(samples) / elapsed, 2),
+        }
+
+    def run_wsgi(self, url, options):
+        for _ in range(options["warmup"]):
+            self.measure_wsgi(url)
+        urls = [url] * options["requests"]
+        started = time.perf_counter()
+        if options["concurrency"] > 1:
+            with ThreadPoolExecutor(options["concurrency"]) as pool:
+                samples = list(pool.map(self.measure_wsgi, urls))
+        else:
+            samples = [self.measure_wsgi(url) for url in urls]
+        return samples, time.perf_counter() - started
+
+    async def run_asgi(self, url, options):
+        client = AsyncClient()
+        for _ in range(options["warmup"]):
+            await self.measure_asgi(client, url)
+        semaphore = asyncio.Semaphore(options["concurrency"])
+
+        async def measure():
+            async with semaphore:
+                return await self.measure_asgi(client, url)
+
+        started = time.perf_counter()
+        samples = await asyncio.gather(
+            *(measure() for _ in range(options["requests"]))
+        )
+        return samples, time.perf_counter() - started
+
+    def measure_wsgi(self, url):
+        client = Client(HTTP_AUTHORIZATION=self.authorization)
+        counter = QueryCounter()
+        start = time.perf_counter()
+        with connection.execute_wrapper(counter):
+            response = client.get(url)
+            self.check_response(url, response)
+            if response.streaming:
+                b"".join(response.streaming_content)
+        return (time.perf_counter() - start) * 1000, counter.count
+
+    async def measure_asgi(self, client, url):
+        """Время запроса и число обращений к БД из Server-Timing"""
+        start = time.perf_counter()
+        response = await client.get(url, authorization=self.authorization)
+        self.check_response(url, response)
+        if response.streaming:
+            await sync_to_async(b"".join)(response.streaming_content)
+        elapsed = (time.perf_counter() - start) * 1000
+        queries = SERVER_TIMING_QUERIES.search(
+            response.get("Server-Timing", "")
+        )
+        return elapsed, int(queries.group(1)) if queries else None
+
+    def check_response(self, url, response):
+        if response.status_code != 200:
+            raise CommandError(f"{url}: статус {response.status_code}")
+
+    def handle(self, *args, **options):
+        if options["requests"] < 2:
+            raise CommandError("Нужно минимум 2 запроса на сценарий")
+        if options["concurrency"] < 1:
+            raise CommandError("Параллельность должна быть не меньше 1")
+        overrides = {"ALLOWED_HOSTS": ["*"]}
+        if options["no_cache"]:
+            overrides["CACHES"] = DUMMY_CACHES
+        latency = SimulatedLatency(options["db_latency"] / 1000)
+        if latency.seconds:
+            # Соединения потоков пула открываются уже во время прогона
+            latency.install(connection=connection)
+            connection_created.connect(latency.install)
+        try:
+            with override_settings(**overrides):
+                report = self.run(options)
+        finally:
+            connection_created.disconnect(latency.install)
+            if latency in connection.execute_wrappers:
+                connection.execute_wrappers.remove(latency)
+        self.stdout.write(
+            f"{'сценарий':<20}{'p50':>10}{'p95':>10}{'p99':>10}"
+            f"{'запросов':>10}{'rps':>10}"
+        )
+        for name, result in report["scenarios"].items():
+            queries = result["queries_per_request"]
+            if queries is None:
+                queries = "-"
+            self.stdout.write(
+                f"{name:<20}{result['p50_ms']:>10}{result['p95_ms']:>10}"
+                f"{result['p99_ms']:>10}{queries:>10}"
+                f"{result['throughput_rps']:>10}"
+            )
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                json.dump(report, file, ensure_ascii=False, indent=2)
+
+    def run(self, options):
+        user = self.get_user()
+        token, _ = Token.objects.get_or_create(user=user)
+        self.authorization = f"Token {token.key}"
+        scenarios = self.get_scenarios()
+        if options["scenarios"]:
+            scenarios = {
+                name: url
+                for name, url in scenarios.items()
+                if name in options["scenarios"]
+            }
+        return {
+            "started": datetime.now(timezone.utc).isoformat(),
+            "database": connection.vendor,
+            "cache": not options["no_cache"],
+            "interface": options["interface"],
+            "async_views": settings.ASYNC_READ_VIEWS,
+            "concurrency": options["concurrency"],
+            "db_latency_ms": options["db_latency"],
+            "scenarios": {
+                name: self.run_scenario(url, options)
+                for name, url in scenarios.items()
+            },
+        }
@@ -0,0 +1,75 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from recipes.importers import BulkImporter, CopyImporter
+from recipes.models import Ingredient, IngredientAmount, Recipe
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнение загрузки через COPY FROM STDIN и пачками bulk_create; "
+        "все изменения откатываются"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=10 ** 6)
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def ingredient_rows(self, total):
+        for number in range(total):
+            yield {
+                "name": f"bench ингредиент {number}",
+                "measurement_unit": "г",
+            }
+
+    def amount_rows(self, total):
+        for number in range(total):
+            yield {
+                "recipe_id": self.recipe_ids[number % len(self.recipe_ids)],
+                "ingredient_id": self.ingredient_ids[
+                    number % len(self.ingredient_ids)
+                ],
+                "amount": number % 500 + 1,
+            }
+
+    def measure(self, importer_class, model, key_fields, rows, batch_size):
+        with transaction.atomic():
+            importer = importer_class(model, key_fields, batch_size)
+            stats = importer.load_rows(rows)
+            transaction.set_rollback(True)
+        return stats
+
+    def handle(self, *args, **options):
+        self.recipe_ids = list(Recipe.objects.values_list("pk", flat=True))
+        self.ingredient_ids = list(
+            Ingredient.objects.values_list("pk", flat=True)
+        )
+        if not self.recipe_ids or not self.ingredient_ids:
+            raise CommandError("Нет данных: выполните seed_load")
+        scenarios = (
+            ("ingredients", Ingredient, ("name", "measurement_unit"),
+             self.ingredient_rows),
+            ("amounts", IngredientAmount, (), self.amount_rows),
+        )
+        importers = [("bulk_create", BulkImporter)]
+        if connection.vendor == "postgresql":
+            importers.append(("COPY", CopyImporter))
+        else:
+            self.stdout.write("COPY недоступен: база не PostgreSQL")
+        self.stdout.write(
+            f"{'сценарий':<14}{'способ':<14}{'строк':>10}"
+            f"{'секунд':>10}{'строк/с':>12}"
+        )
+        for name, model, key_fields, rows in scenarios:
+            for method, importer_class in importers:
+                stats = self.measure(
+                    importer_class,
+                    model,
+                    key_fields,
+                    rows(options["rows"]),
+                    options["batch_size"],
+                )
+                self.stdout.write(
+                    f"{name:<14}{method:<14}{stats.rows:>10}"
+                    f"{stats.seconds:>10.2f}{stats.rows_per_second:>12.0f}"
+                )
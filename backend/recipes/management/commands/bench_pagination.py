@@ -0,0 +1,156 @@
+import statistics
+import time
+from datetime import timedelta
+from urllib.parse import parse_qs, urlparse
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from rest_framework.pagination import Cursor
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.paginator import LimitedCursorPagination, LimitedPagination
+from recipes.importers import chunked
+from recipes.models import Recipe
+
+UserModel = get_user_model()
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнение постраничной и курсорной пагинации ленты рецептов "
+        "и проход ленты по курсору; созданные рецепты откатываются"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--recipes", type=int, default=100_000)
+        parser.add_argument("--limit", type=int, default=6)
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--depths", type=int, nargs="*", default=(1, 100, 1000, 10000)
+        )
+        parser.add_argument(
+            "--ties",
+            type=int,
+            default=1500,
+            help="Сколько созданных рецептов получают одну дату публикации",
+        )
+        parser.add_argument("--walk-limit", type=int, default=100)
+
+    def ensure_recipes(self, total, ties):
+        missing = total - Recipe.objects.count()
+        if missing <= 0:
+            return
+        author = UserModel.objects.create(
+            email="bench@foodgram.local",
+            username="bench",
+            first_name="bench",
+            last_name="bench",
+        )
+        self.stdout.write(f"Создание {missing} рецептов")
+        Recipe.objects.bulk_create(
+            (
+                Recipe(author=author, name=f"bench {number}", text="bench")
+                for number in range(missing)
+            ),
+            batch_size=5000,
+        )
+        # Одинаковые даты проверяют порядок по id внутри курсора
+        pub_date = timezone.now()
+        created = Recipe.objects.filter(author=author).order_by("pk")
+        for group in chunked(created.values_list("pk", flat=True), ties):
+            pub_date -= timedelta(minutes=1)
+            Recipe.objects.filter(pk__in=group).update(pub_date=pub_date)
+
+    def measure(self, paginate, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            paginate()
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings)
+
+    def get_cursor(self, queryset, offset):
+        paginator = LimitedCursorPagination()
+        paginator.base_url = "/"
+        if offset == 0:
+            position = None
+        else:
+            position = paginator.encode_position(queryset[offset - 1])
+        url = paginator.encode_cursor(Cursor(0, False, position))
+        query = parse_qs(urlparse(url).query, keep_blank_values=True)
+        return query["cursor"][0]
+
+    def walk(self, queryset, limit):
+        """Проходит всю ленту по ссылкам next, возвращает id рецептов"""
+        factory = APIRequestFactory()
+        params = {"cursor": self.get_cursor(queryset, 0), "limit": limit}
+        seen = []
+        while params is not None:
+            paginator = LimitedCursorPagination()
+            page = paginator.paginate_queryset(
+                queryset, Request(factory.get("/", params))
+            )
+            seen.extend(recipe.pk for recipe in page)
+            if len(seen) > self.total:
+                break
+            next_link = paginator.get_next_link()
+            params = next_link and {
+                key: values[0]
+                for key, values in parse_qs(urlparse(next_link).query).items()
+            }
+        return seen
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.ensure_recipes(options["recipes"], options["ties"])
+            self.benchmark(options)
+            transaction.set_rollback(True)
+
+    def benchmark(self, options):
+        factory = APIRequestFactory()
+        queryset = Recipe.objects.all()
+        limit = options["limit"]
+        self.stdout.write(
+            f"{'страница':>10}{'offset, мс':>14}{'cursor, мс':>14}"
+        )
+        for depth in options["depths"]:
+            offset_request = Request(
+                factory.get("/", {"page": depth, "limit": limit})
+            )
+            cursor_request = Request(
+                factory.get(
+                    "/",
+                    {
+                        "cursor": self.get_cursor(
+                            queryset, (depth - 1) * limit
+                        ),
+                        "limit": limit,
+                    },
+                )
+            )
+            offset_time = self.measure(
+                lambda: LimitedPagination().paginate_queryset(
+                    queryset, offset_request
+                ),
+                options["repeat"],
+            )
+            cursor_time = self.measure(
+                lambda: LimitedCursorPagination().paginate_queryset(
+                    queryset, cursor_request
+                ),
+                options["repeat"],
+            )
+            self.stdout.write(
+                f"{depth:>10}{offset_time:>14.3f}{cursor_time:>14.3f}"
+            )
+        self.total = queryset.count()
+        seen = self.walk(queryset, options["walk_limit"])
+        if len(seen) != self.total or len(set(seen)) != self.total:
+            raise CommandError(
+                f"Проход по курсору: {len(seen)} рецептов, "
+                f"уникальных {len(set(seen))}, в базе {self.total}"
+            )
+        self.stdout.write(f"Проход по курсору: {self.total} рецептов")
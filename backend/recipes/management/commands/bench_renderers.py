@@ -0,0 +1,77 @@
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from api.renderers import FastJSONRenderer
+
+UserModel = get_user_model()
+
+SCENARIOS = {
+    "ingredients": "/api/ingredients/",
+    "feed": "/api/recipes/?limit=50",
+    "subscriptions": "/api/users/subscriptions/?limit=50",
+    "tags": "/api/tags/",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнение времени и памяти рендеринга JSON на крупных ответах: "
+        "JSONRenderer из DRF и FastJSONRenderer"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50)
+
+    def get_data(self, client, url):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise CommandError(f"{url}: статус {response.status_code}")
+        return response.data
+
+    def measure(self, renderer, data, total):
+        timings = []
+        for _ in range(total):
+            start = time.perf_counter()
+            renderer.render(data)
+            timings.append((time.perf_counter() - start) * 1000)
+        tracemalloc.start()
+        renderer.render(data)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return statistics.median(timings), peak / 1024
+
+    @override_settings(ALLOWED_HOSTS=["*"])
+    def handle(self, *args, **options):
+        client = APIClient()
+        user = UserModel.objects.filter(follower__isnull=False).first()
+        if user is not None:
+            client.force_authenticate(user)
+        renderers = (JSONRenderer(), FastJSONRenderer())
+        self.stdout.write(
+            f"{'сценарий':<16}{'КБ':>8}{'DRF мс':>10}{'orjson мс':>11}"
+            f"{'DRF КБ':>10}{'orjson КБ':>11}"
+        )
+        for name, url in SCENARIOS.items():
+            if user is None and "subscriptions" in url:
+                continue
+            data = self.get_data(client, url)
+            expected, actual = (
+                renderer.render(data) for renderer in renderers
+            )
+            if actual != expected:
+                raise CommandError(f"{url}: вывод рендереров различается")
+            (drf_ms, drf_peak), (fast_ms, fast_peak) = (
+                self.measure(renderer, data, options["requests"])
+                for renderer in renderers
+            )
+            self.stdout.write(
+                f"{name:<16}{len(expected) / 1024:>8.1f}{drf_ms:>10.3f}"
+                f"{fast_ms:>11.3f}{drf_peak:>10.1f}{fast_peak:>11.1f}"
+            )
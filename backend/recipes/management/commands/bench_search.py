@@ -0,0 +1,46 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from api.search import get_ingredient_search
+from recipes.models import Ingredient
+
+DEFAULT_QUERIES = ("а", "мо", "сыр", "кар", "соус", "масло", "ябл")
+
+
+class Command(BaseCommand):
+    help = "Замер задержки поиска ингредиентов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("queries", nargs="*", default=DEFAULT_QUERIES)
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument("--limit", type=int, default=None)
+
+    def measure(self, search, query, repeat):
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            list(search(query))
+            timings.append((time.perf_counter() - start) * 1000)
+        return statistics.median(timings), max(timings)
+
+    def handle(self, *args, **options):
+        backend = get_ingredient_search(limit=options["limit"])
+        searches = {
+            "icontains": lambda query: Ingredient.objects.filter(
+                name__icontains=query
+            ),
+            type(backend).__name__: backend.search,
+        }
+        self.stdout.write(
+            f"{'запрос':<10}{'поиск':<30}{'p50, мс':>10}{'max, мс':>10}"
+        )
+        for query in options["queries"]:
+            for name, search in searches.items():
+                median, worst = self.measure(
+                    search, query, options["repeat"]
+                )
+                self.stdout.write(
+                    f"{query:<10}{name:<30}{median:>10.3f}{worst:>10.3f}"
+                )
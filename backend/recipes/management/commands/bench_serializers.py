@@ -0,0 +1,80 @@
+import statistics
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.test import override_settings
+from rest_framework.test import APIClient
+
+UserModel = get_user_model()
+
+SCENARIOS = {
+    "feed": "/api/recipes/?limit={limit}",
+    "subscriptions": "/api/users/subscriptions/?limit={limit}",
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Сравнение процессорного времени на страницу ленты и подписок: "
+        "DRF-сериализаторы и быстрый путь"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=50)
+        parser.add_argument("--warmup", type=int, default=5)
+        parser.add_argument("--limit", type=int, default=6)
+
+    def get_user(self):
+        """Пользователь с наибольшим числом подписок"""
+        user = (
+            UserModel.objects.annotate(follows=Count("follower"))
+            .filter(follows__gt=0)
+            .order_by("-follows")
+            .first()
+        )
+        if user is None:
+            raise CommandError("Нет данных: выполните seed_load")
+        return user
+
+    def measure(self, client, url, options, fast):
+        with override_settings(FAST_READ_SERIALIZERS=fast):
+            for _ in range(options["warmup"]):
+                client.get(url)
+            cpu = []
+            wall = []
+            for _ in range(options["requests"]):
+                cpu_start = time.process_time()
+                wall_start = time.perf_counter()
+                response = client.get(url)
+                wall.append((time.perf_counter() - wall_start) * 1000)
+                cpu.append((time.process_time() - cpu_start) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f"{url}: статус {response.status_code}")
+        return statistics.mean(cpu), statistics.median(wall)
+
+    @override_settings(
+        CACHES={
+            "default": {
+                "BACKEND": "django.core.cache.backends.dummy.DummyCache"
+            }
+        },
+        ALLOWED_HOSTS=["*"],
+    )
+    def handle(self, *args, **options):
+        client = APIClient()
+        client.force_authenticate(self.get_user())
+        self.stdout.write(
+            f"{'сценарий':<16}{'DRF cpu':>10}{'быстро cpu':>12}"
+            f"{'DRF p50':>10}{'быстро p50':>12}{'экономия':>10}"
+        )
+        for name, url in SCENARIOS.items():
+            url = url.format(limit=options["limit"])
+            drf_cpu, drf_wall = self.measure(client, url, options, False)
+            fast_cpu, fast_wall = self.measure(client, url, options, True)
+            saved = (1 - fast_cpu / drf_cpu) * 100 if drf_cpu else 0
+            self.stdout.write(
+                f"{name:<16}{drf_cpu:>10.3f}{fast_cpu:>12.3f}"
+                f"{drf_wall:>10.3f}{fast_wall:>12.3f}{saved:>9.1f}%"
+            )
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+
+from recipes.images import build_renditions, needs_renditions
+from recipes.models import Recipe
+
+
+class Command(BaseCommand):
+    help = "Построение уменьшенных копий фото рецептов (JPEG и WebP)"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Перестроить копии у всех рецептов",
+        )
+
+    def handle(self, *args, **options):
+        built = failed = 0
+        recipes = Recipe.objects.only("image", "renditions").order_by("pk")
+        for recipe in recipes.iterator():
+            if not options["force"] and not needs_renditions(recipe):
+                continue
+            try:
+                built += build_renditions(recipe.pk)
+            except OSError as error:
+                failed += 1
+                self.stderr.write(f"Рецепт {recipe.pk}: {error}")
+        self.stdout.write(f"Обработано: {built}, с ошибками: {failed}")
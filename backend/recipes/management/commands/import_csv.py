@@ -1,32 +1,57 @@
-import csv
-
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
-from recipes.models import Ingredient, Tag
+from recipes.importers import CATALOGS, get_importer, read_rows
 
-ModelsCSV = {
-    Ingredient: "ingredients.csv",
-    Tag: "tags.csv",
+DEFAULT_FILES = {
+    "ingredients": "ingredients.csv",
+    "tags": "tags.csv",
 }
 
 
 class Command(BaseCommand):
-    help = "Импорт данных из csv файлов"
+    help = (
+        "Импорт справочников из csv или json файлов: upsert пачками "
+        "в одной транзакции без удаления существующих записей"
+    )
 
-    def handle(self, *args, **options):
-        for model, csv_files in ModelsCSV.items():
-            model.objects.all().delete()
-            path_to_file = f"{settings.CSV_DIR}/{csv_files}"
-            print(f"Начат импорт данных из файла {path_to_file}")
-            with open(
-                path_to_file,
-                mode="r",
-                encoding="utf-8",
-            ) as csv_file:
-                reader = csv.DictReader(csv_file)
-                model.objects.bulk_create(model(**data) for data in reader)
-            self.stdout.write(
-                f"Завершен импорт данных в модель {model.__name__}"
+    def add_arguments(self, parser):
+        for name, file_name in DEFAULT_FILES.items():
+            parser.add_argument(
+                f"--{name}",
+                default=settings.CSV_DIR / file_name,
+                help=f"Файл справочника (.csv или .json), по умолчанию "
+                f"{file_name}",
             )
-        return "Импорт всех данных завершен."
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--copy",
+            action="store_true",
+            help="Загрузка через COPY FROM STDIN (только PostgreSQL)",
+        )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size должен быть больше нуля")
+        with transaction.atomic():
+            for name, (model, key_fields) in CATALOGS.items():
+                path = options[name]
+                self.stdout.write(f"Начат импорт данных из файла {path}")
+                importer = get_importer(
+                    model,
+                    key_fields,
+                    options["batch_size"],
+                    copy=options["copy"],
+                )
+                try:
+                    stats = importer.run(read_rows(path))
+                except (OSError, ValueError, KeyError) as error:
+                    raise CommandError(f"{path}: {error!r}")
+                self.stdout.write(
+                    f"{model.__name__}: строк {stats.rows}, "
+                    f"добавлено {stats.created}, "
+                    f"обновлено {stats.updated}, "
+                    f"{stats.rows_per_second:.0f} строк/с"
+                )
+        self.stdout.write("Импорт всех данных завершен.")
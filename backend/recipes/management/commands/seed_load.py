@@ -0,0 +1,208 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api.catalog import bump_catalog_version
+from recipes.counters import reconcile_counters
+from recipes.importers import get_importer
+from recipes.models import (
+    Cart,
+    Favorite,
+    Ingredient,
+    IngredientAmount,
+    Recipe,
+    Tag
+)
+from users.models import Follow
+
+UserModel = get_user_model()
+
+SEED_PREFIX = "seed"
+
+
+class Command(BaseCommand):
+    help = "Генерация нагрузочных данных: пользователи, рецепты, подписки"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=1000)
+        parser.add_argument("--recipes", type=int, default=10000)
+        parser.add_argument("--ingredients-per-recipe", type=int, default=8)
+        parser.add_argument("--tags-per-recipe", type=int, default=2)
+        parser.add_argument("--favorites", type=int, default=50000)
+        parser.add_argument("--carts", type=int, default=20000)
+        parser.add_argument("--follows", type=int, default=10000)
+        parser.add_argument("--seed", type=int, default=42)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=365,
+            help="За сколько последних дней разбросать даты публикации",
+        )
+        parser.add_argument(
+            "--copy",
+            action="store_true",
+            help="Загрузка через COPY FROM STDIN (только PostgreSQL)",
+        )
+
+    def bulk_create(self, model, rows, key_fields=()):
+        """Загружает строки пачками, не держа в памяти весь генератор"""
+        importer = get_importer(
+            model, key_fields, self.batch_size, update=False, copy=self.copy
+        )
+        stats = importer.load_rows(rows)
+        self.stdout.write(
+            f"{model.__name__}: {stats.created}, "
+            f"{stats.rows_per_second:.0f} строк/с"
+        )
+
+    def random_pairs(self, left, right, total):
+        pairs = set()
+        attempts = total * 3
+        while len(pairs) < total and attempts:
+            pairs.add((self.rng.choice(left), self.rng.choice(right)))
+            attempts -= 1
+        return sorted(pairs)
+
+    def create_users(self, total):
+        password = make_password(SEED_PREFIX)
+        start = UserModel.objects.filter(
+            username__startswith=f"{SEED_PREFIX}_"
+        ).count()
+        self.bulk_create(
+            UserModel,
+            (
+                {
+                    "email": f"{SEED_PREFIX}_{number}@foodgram.local",
+                    "username": f"{SEED_PREFIX}_{number}",
+                    "first_name": SEED_PREFIX,
+                    "last_name": str(number),
+                    "password": password,
+                }
+                for number in range(start, start + total)
+            ),
+        )
+        return list(
+            UserModel.objects.filter(
+                username__startswith=f"{SEED_PREFIX}_"
+            ).values_list("pk", flat=True)
+        )
+
+    def create_recipes(self, user_ids, total):
+        known = set(
+            Recipe.objects.filter(author_id__in=user_ids).values_list(
+                "pk", flat=True
+            )
+        )
+        self.bulk_create(
+            Recipe,
+            (
+                {
+                    "author_id": self.rng.choice(user_ids),
+                    "name": f"{SEED_PREFIX} recipe {number}",
+                    "text": f"{SEED_PREFIX} text {number}",
+                    "image": f"recipes/images/{SEED_PREFIX}.png",
+                    "cooking_time": self.rng.randint(1, 180),
+                }
+                for number in range(total)
+            ),
+        )
+        return [
+            pk
+            for pk in Recipe.objects.filter(
+                author_id__in=user_ids
+            ).values_list("pk", flat=True)
+            if pk not in known
+        ]
+
+    def spread_pub_dates(self, recipe_ids, days):
+        """Случайные даты публикации: иначе у пачки рецептов они почти
+        совпадают и лента по курсору не похожа на настоящую"""
+        now = timezone.now()
+        seconds = days * 24 * 60 * 60
+        Recipe.objects.bulk_update(
+            (
+                Recipe(
+                    pk=pk,
+                    pub_date=now - timedelta(
+                        seconds=self.rng.randint(0, seconds)
+                    ),
+                )
+                for pk in recipe_ids
+            ),
+            ["pub_date"],
+            batch_size=1000,
+        )
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.copy = options["copy"]
+        ingredient_ids = list(Ingredient.objects.values_list("pk", flat=True))
+        tag_ids = list(Tag.objects.values_list("pk", flat=True))
+        if not ingredient_ids or not tag_ids:
+            raise CommandError("Сначала загрузите справочники: import_csv")
+        with transaction.atomic():
+            user_ids = self.create_users(options["users"])
+            recipe_ids = self.create_recipes(user_ids, options["recipes"])
+            self.spread_pub_dates(recipe_ids, options["days"])
+            self.bulk_create(
+                Recipe.tags.through,
+                (
+                    {"recipe_id": recipe_id, "tag_id": tag_id}
+                    for recipe_id in recipe_ids
+                    for tag_id in self.rng.sample(
+                        tag_ids, min(options["tags_per_recipe"], len(tag_ids))
+                    )
+                ),
+            )
+            per_recipe = min(
+                options["ingredients_per_recipe"], len(ingredient_ids)
+            )
+            self.bulk_create(
+                IngredientAmount,
+                (
+                    {
+                        "recipe_id": recipe_id,
+                        "ingredient_id": ingredient_id,
+                        "amount": self.rng.randint(1, 500),
+                    }
+                    for recipe_id in recipe_ids
+                    for ingredient_id in self.rng.sample(
+                        ingredient_ids, per_recipe
+                    )
+                ),
+            )
+            for model, total in ((Favorite, "favorites"), (Cart, "carts")):
+                self.bulk_create(
+                    model,
+                    (
+                        {"user_id": user_id, "recipe_id": recipe_id}
+                        for user_id, recipe_id in self.random_pairs(
+                            user_ids, recipe_ids, options[total]
+                        )
+                    ),
+                    key_fields=("recipe_id", "user_id"),
+                )
+            self.bulk_create(
+                Follow,
+                (
+                    {"user_id": user_id, "author_id": author_id}
+                    for user_id, author_id in self.random_pairs(
+                        user_ids, user_ids, options["follows"]
+                    )
+                    if user_id != author_id
+                ),
+                key_fields=("user_id", "author_id"),
+            )
+            reconcile_counters()
+        bump_catalog_version(Recipe)
+        self.stdout.write(
+            f"Готово: {len(user_ids)} пользователей, "
+            f"{len(recipe_ids)} новых рецептов"
+        )
@@ -0,0 +1,57 @@
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+COUNTERS = (
+    ("recipes", "Recipe", "favorites_count", "recipes", "Favorite", "recipe"),
+    ("recipes", "Recipe", "carts_count", "recipes", "Cart", "recipe"),
+    ("users", "User", "recipes_count", "recipes", "Recipe", "author"),
+    ("users", "User", "followers_count", "users", "Follow", "author"),
+    ("users", "User", "subscriptions_count", "users", "Follow", "user"),
+)
+
+
+def fill_counters(apps, schema_editor):
+    for app, model, field, source_app, source, relation in COUNTERS:
+        source_model = apps.get_model(source_app, source)
+        apps.get_model(app, model).objects.update(
+            **{
+                field: Coalesce(
+                    Subquery(
+                        source_model.objects.filter(
+                            **{relation: OuterRef("pk")}
+                        )
+                        .order_by()
+                        .values(relation)
+                        .annotate(total=Count("pk"))
+                        .values("total")
+                    ),
+                    0,
+                )
+            }
+        )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("users", "0004_user_counters"),
+        ("recipes", "0013_recipe_pub_date_id_idx"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="favorites_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="В избранном"
+            ),
+        ),
+        migrations.AddField(
+            model_name="recipe",
+            name="carts_count",
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name="В корзинах"
+            ),
+        ),
+        migrations.RunPython(fill_counters, migrations.RunPython.noop),
+    ]
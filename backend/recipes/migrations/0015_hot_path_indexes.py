@@ -0,0 +1,90 @@
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+# Модель списка пользователя и счетчик рецепта по ней
+USER_LISTS = (
+    ("Favorite", "favorites_count"),
+    ("Cart", "carts_count"),
+)
+
+
+def remove_duplicates(apps, schema_editor):
+    """Оставляет по одной записи на пару (рецепт, пользователь)"""
+    Recipe = apps.get_model("recipes", "Recipe")
+    for name, counter in USER_LISTS:
+        model = apps.get_model("recipes", name)
+        first = (
+            model.objects.order_by()
+            .values("recipe", "user")
+            .annotate(first=Min("pk"))
+            .values("first")
+        )
+        deleted, _ = model.objects.exclude(pk__in=first).delete()
+        if not deleted:
+            continue
+        Recipe.objects.update(
+            **{
+                counter: Coalesce(
+                    Subquery(
+                        model.objects.filter(recipe=OuterRef("pk"))
+                        .order_by()
+                        .values("recipe")
+                        .annotate(total=Count("pk"))
+                        .values("total")
+                    ),
+                    0,
+                )
+            }
+        )
+    if schema_editor.connection.vendor == "postgresql":
+        # Отложенные проверки внешних ключей не дают изменить таблицы
+        schema_editor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0014_recipe_counters"),
+    ]
+
+    operations = [
+        migrations.RunPython(remove_duplicates, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="recipe",
+            index=models.Index(
+                fields=["author", "-pub_date"],
+                name="recipe_author_pub_date_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ingredientamount",
+            index=models.Index(
+                fields=["recipe", "ingredient"],
+                name="ingredient_amount_recipe_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="favorite",
+            constraint=models.UniqueConstraint(
+                fields=("recipe", "user"), name="unique_favorite"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="favorite",
+            index=models.Index(
+                fields=["user", "recipe"], name="favorite_user_recipe_idx"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="cart",
+            constraint=models.UniqueConstraint(
+                fields=("recipe", "user"), name="unique_cart"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="cart",
+            index=models.Index(
+                fields=["user", "recipe"], name="cart_user_recipe_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,19 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0015_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="recipe",
+            name="renditions",
+            field=models.JSONField(
+                default=dict,
+                editable=False,
+                verbose_name="Уменьшенные копии фото",
+            ),
+        ),
+    ]
@@ -0,0 +1,64 @@
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def merge_duplicate_ingredients(apps, schema_editor):
+    """Оставляет первый из одинаковых ингредиентов, ссылки переводит на него"""
+    Ingredient = apps.get_model("recipes", "Ingredient")
+    IngredientAmount = apps.get_model("recipes", "IngredientAmount")
+    Through = apps.get_model("recipes", "Recipe").ingredients.through
+    duplicates = (
+        Ingredient.objects.order_by()
+        .values("name", "measurement_unit")
+        .annotate(keep=Min("pk"), total=Count("pk"))
+        .filter(total__gt=1)
+    )
+    for row in duplicates:
+        keep = row["keep"]
+        extra = list(
+            Ingredient.objects.filter(
+                name=row["name"], measurement_unit=row["measurement_unit"]
+            )
+            .exclude(pk=keep)
+            .values_list("pk", flat=True)
+        )
+        IngredientAmount.objects.filter(ingredient_id__in=extra).update(
+            ingredient_id=keep
+        )
+        recipe_ids = set(
+            Through.objects.filter(ingredient_id__in=extra).values_list(
+                "recipe_id", flat=True
+            )
+        )
+        recipe_ids -= set(
+            Through.objects.filter(
+                ingredient_id=keep, recipe_id__in=recipe_ids
+            ).values_list("recipe_id", flat=True)
+        )
+        Through.objects.filter(ingredient_id__in=extra).delete()
+        Through.objects.bulk_create(
+            Through(recipe_id=recipe_id, ingredient_id=keep)
+            for recipe_id in recipe_ids
+        )
+        Ingredient.objects.filter(pk__in=extra).delete()
+    if schema_editor.connection.vendor == "postgresql":
+        # Отложенные проверки внешних ключей не дают изменить таблицу
+        schema_editor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("recipes", "0016_recipe_renditions"),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            merge_duplicate_ingredients, migrations.RunPython.noop
+        ),
+        migrations.AddConstraint(
+            model_name="ingredient",
+            constraint=models.UniqueConstraint(
+                fields=("name", "measurement_unit"), name="unique_ingredient"
+            ),
+        ),
+    ]
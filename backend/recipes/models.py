@@ -3,6 +3,7 @@ from django.db import models
 from django.contrib.auth import get_user_model
 
 from api.params import MAX_AMOUNT, MIN_AMOUNT
+from users.models import CounterFieldsMixin, Follow
 
 
 UserModel = get_user_model()
@@ -74,8 +75,30 @@ class NewQuerySet(models.QuerySet):
             ),
         )
 
+    def for_feed(self, user):
+        """Страница ленты рецептов за фиксированное число запросов"""
+        return self.add_annotations(user.pk).prefetch_related(
+            models.Prefetch(
+                "author",
+                queryset=UserModel.objects.annotate(
+                    is_subscribed=models.Exists(
+                        Follow.objects.filter(
+                            author=models.OuterRef("pk"), user_id=user.pk
+                        )
+                    )
+                ),
+            ),
+            "tags",
+            models.Prefetch(
+                "ingredients_amount",
+                queryset=IngredientAmount.objects.select_related(
+                    "ingredient"
+                ),
+            ),
+        )
+
 
-class Recipe(models.Model):
+class Recipe(CounterFieldsMixin, models.Model):
     """Модель рецептов"""
 
     name = models.CharField(
@@ -95,6 +118,9 @@ class Recipe(models.Model):
     image = models.ImageField(
         blank=False, upload_to="recipes/images", verbose_name="Фото"
     )
+    renditions = models.JSONField(
+        default=dict, editable=False, verbose_name="Уменьшенные копии фото"
+    )
     text = models.TextField(verbose_name="Описание")
     pub_date = models.DateTimeField(
         auto_now_add=True, verbose_name="Дата публикации"
@@ -109,12 +135,28 @@ class Recipe(models.Model):
         ],
         default=MIN_AMOUNT,
     )
+    favorites_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="В избранном"
+    )
+    carts_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="В корзинах"
+    )
+    counter_fields = ("favorites_count", "carts_count")
     objects = NewQuerySet.as_manager()
 
     class Meta:
-        ordering = ("-pub_date",)
+        ordering = ("-pub_date", "-id")
         verbose_name = "Рецепт"
         verbose_name_plural = "Рецепты"
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"], name="recipe_pub_date_id_idx"
+            ),
+            models.Index(
+                fields=["author", "-pub_date"],
+                name="recipe_author_pub_date_idx",
+            ),
+        ]
 
     def __str__(self) -> str:
         return f"{self.name} автор {self.author.username}"
@@ -154,6 +196,12 @@ class IngredientAmount(models.Model):
         ordering = ("-id",)
         verbose_name = "Ингридиент"
         verbose_name_plural = "Ингридиенты"
+        indexes = [
+            models.Index(
+                fields=["recipe", "ingredient"],
+                name="ingredient_amount_recipe_idx",
+            )
+        ]
 
     def __str__(self) -> str:
         return f"{self.ingredient}: {self.amount}"
@@ -190,6 +238,11 @@ class Favorite(models.Model):
                 name="unique_favorite",
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["user", "recipe"], name="favorite_user_recipe_idx"
+            )
+        ]
 
 
 class Cart(models.Model):
@@ -223,6 +276,11 @@ class Cart(models.Model):
                 name="unique_cart",
             )
         ]
+        indexes = [
+            models.Index(
+                fields=["user", "recipe"], name="cart_user_recipe_idx"
+            )
+        ]
 
     def __str__(self) -> str:
         return f"Корзина для {self.user.username}: {self.recipe.name}"
@@ -0,0 +1,27 @@
+from django.db.models.signals import post_delete, post_save
+
+from .counters import COUNTERS, change_counters
+from .images import needs_renditions, schedule_renditions
+from .models import Recipe
+
+
+def increase_counters(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        change_counters(instance, 1)
+
+
+def decrease_counters(sender, instance, **kwargs):
+    change_counters(instance, -1)
+
+
+for sender in COUNTERS:
+    post_save.connect(increase_counters, sender=sender)
+    post_delete.connect(decrease_counters, sender=sender)
+
+
+def schedule_image_renditions(sender, instance, raw=False, **kwargs):
+    if not raw and needs_renditions(instance):
+        schedule_renditions(instance.pk)
+
+
+post_save.connect(schedule_image_renditions, sender=Recipe)
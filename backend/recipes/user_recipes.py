@@ -0,0 +1,114 @@
+import datetime
+
+from django.db import connection, transaction
+
+from .counters import COUNTERS, change_counters_many
+from .models import Recipe
+
+CREATED = "created"
+EXISTS = "exists"
+DELETED = "deleted"
+NOT_FOUND = "not_found"
+
+
+def execute_returning(model, sql, params, delta):
+    """Выполняет INSERT или DELETE ... RETURNING id рецептов.
+
+    На PostgreSQL счетчик рецептов меняется в том же запросе через
+    CTE, на остальных базах - отдельным UPDATE.
+    """
+    qn = connection.ops.quote_name
+    recipe_column = qn(model._meta.get_field("recipe").column)
+    if connection.vendor != "postgresql":
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(f"{sql} RETURNING {recipe_column}", params)
+            changed = [pk for pk, in cursor.fetchall()]
+            change_counters_many(model, {"recipe": changed}, delta)
+        return changed
+    ((_, _, field),) = COUNTERS[model]
+    field = qn(field)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"WITH changed AS ({sql} RETURNING {recipe_column}), "
+            f"counted AS (UPDATE {qn(Recipe._meta.db_table)} "
+            f"SET {field} = GREATEST({field} + %s, 0) "
+            f"WHERE {qn(Recipe._meta.pk.column)} IN "
+            f"(SELECT {recipe_column} FROM changed)) "
+            f"SELECT {recipe_column} FROM changed",
+            params + [delta],
+        )
+        return [pk for pk, in cursor.fetchall()]
+
+
+def insert_recipes(model, user, recipe_ids):
+    """INSERT ... ON CONFLICT DO NOTHING, возвращает id добавленных.
+
+    Рецепты должны существовать: внешние ключи проверяются при коммите.
+    """
+    if not recipe_ids:
+        return []
+    qn = connection.ops.quote_name
+    opts = model._meta
+    columns = ", ".join(
+        qn(opts.get_field(name).column)
+        for name in ("recipe", "user", "add_date")
+    )
+    values = ", ".join(["(%s, %s, %s)"] * len(recipe_ids))
+    today = datetime.date.today()
+    params = []
+    for pk in recipe_ids:
+        params.extend((pk, user.pk, today))
+    sql = (
+        f"INSERT INTO {qn(opts.db_table)} ({columns}) VALUES {values} "
+        "ON CONFLICT DO NOTHING"
+    )
+    return execute_returning(model, sql, params, 1)
+
+
+def add_recipes(model, user, recipe_ids):
+    """Добавляет рецепты в избранное или корзину одной вставкой.
+
+    Возвращает пары (id, статус) в порядке запроса без повторов.
+    """
+    recipe_ids = list(dict.fromkeys(recipe_ids))
+    found = set(
+        Recipe.objects.filter(pk__in=recipe_ids).values_list("pk", flat=True)
+    )
+    created = set(
+        insert_recipes(
+            model, user, [pk for pk in recipe_ids if pk in found]
+        )
+    )
+    return [
+        (
+            pk,
+            CREATED if pk in created
+            else EXISTS if pk in found
+            else NOT_FOUND,
+        )
+        for pk in recipe_ids
+    ]
+
+
+def remove_recipes(model, user, recipe_ids=None):
+    """Удаляет рецепты из списка пользователя, без recipe_ids - все.
+
+    Один DELETE ... RETURNING; возвращает id удаленных рецептов.
+    """
+    qn = connection.ops.quote_name
+    opts = model._meta
+    sql = (
+        f"DELETE FROM {qn(opts.db_table)} "
+        f"WHERE {qn(opts.get_field('user').column)} = %s"
+    )
+    params = [user.pk]
+    if recipe_ids is not None:
+        if not recipe_ids:
+            return []
+        placeholders = ", ".join(["%s"] * len(recipe_ids))
+        sql += (
+            f" AND {qn(opts.get_field('recipe').column)} "
+            f"IN ({placeholders})"
+        )
+        params.extend(recipe_ids)
+    return execute_returning(model, sql, params, -1)
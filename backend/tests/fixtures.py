@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+
+from recipes.models import Ingredient, IngredientAmount, Recipe, Tag
+
+UserModel = get_user_model()
+
+
+def create_user(name, **fields):
+    fields.setdefault("first_name", name)
+    fields.setdefault("last_name", name)
+    return UserModel.objects.create(
+        email=f"{name}@foodgram.local", username=name, **fields
+    )
+
+
+def create_tag(name, color):
+    return Tag.objects.create(name=name, color=color, slug=name)
+
+
+def create_ingredient(name, measurement_unit="г"):
+    return Ingredient.objects.create(
+        name=name, measurement_unit=measurement_unit
+    )
+
+
+def create_recipe(author, name, tags=(), amounts=(), **fields):
+    """Рецепт с тегами; amounts - пары (ингредиент, количество).
+
+    Без image фото не обрабатывается после коммита.
+    """
+    fields.setdefault("text", name)
+    fields.setdefault("image", "")
+    recipe = Recipe.objects.create(author=author, name=name, **fields)
+    recipe.tags.add(*tags)
+    for ingredient, amount in amounts:
+        IngredientAmount.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=amount
+        )
+    return recipe
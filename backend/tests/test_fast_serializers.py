@@ -0,0 +1,107 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import Cart, Favorite, Recipe
+from users.models import Follow
+from .fixtures import (
+    create_ingredient,
+    create_recipe,
+    create_tag,
+    create_user
+)
+
+DUMMY_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+}
+
+CHECKED_URLS = (
+    "/api/recipes/",
+    "/api/recipes/?limit=20",
+    "/api/recipes/?page=2&limit=2",
+    "/api/recipes/?count=0",
+    "/api/recipes/?cursor=",
+    "/api/recipes/?tags={tag}",
+    "/api/recipes/?author={author}",
+    "/api/recipes/?is_favorited=1",
+    "/api/recipes/?is_in_shopping_cart=1",
+)
+SUBSCRIPTION_URLS = (
+    "/api/users/subscriptions/",
+    "/api/users/subscriptions/?recipes_limit=1",
+    "/api/users/subscriptions/?limit=1&page=2",
+)
+RENDITIONS = {
+    "source": "recipes/images/shape.png",
+    "images": {
+        "card": {
+            "jpeg": "recipes/renditions/shape_card.jpg",
+            "webp": "recipes/renditions/shape_card.webp",
+        }
+    },
+}
+
+
+@override_settings(CACHES=DUMMY_CACHES)
+class FastSerializersTest(TestCase):
+    """Быстрые сериализаторы ленты и подписок отдают то же, что DRF"""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [
+            create_user(f"shape_{number}", last_name=str(number))
+            for number in range(3)
+        ]
+        cls.user, cls.author = users[0], users[1]
+        tags = [
+            create_tag(f"shape_{number}", f"#00000{number}")
+            for number in range(2)
+        ]
+        cls.tag = tags[1]
+        ingredients = [
+            create_ingredient(f"форма {number}") for number in range(3)
+        ]
+        for number in range(5):
+            recipe = create_recipe(
+                users[number % 3],
+                f"shape {number}",
+                tags=tags[:number % 2 + 1],
+                amounts=[
+                    (ingredient, number + 2)
+                    for ingredient in ingredients[:number % 3 + 1]
+                ],
+                image="" if number == 4 else "recipes/images/shape.png",
+                cooking_time=number + 1,
+            )
+            if number % 2:
+                # Renditions заполняются после коммита, здесь - вручную
+                Recipe.objects.filter(pk=recipe.pk).update(
+                    renditions=RENDITIONS
+                )
+                Favorite.objects.create(user=cls.user, recipe=recipe)
+            if number % 3:
+                Cart.objects.create(user=cls.user, recipe=recipe)
+        Follow.objects.create(user=cls.user, author=users[1])
+        Follow.objects.create(user=cls.user, author=users[2])
+
+    def get_content(self, client, url, fast):
+        with override_settings(FAST_READ_SERIALIZERS=fast):
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return response.content.decode()
+
+    def assert_same_output(self, client, paths):
+        for path in paths:
+            url = path.format(tag=self.tag.slug, author=self.author.pk)
+            with self.subTest(url=url):
+                self.assertEqual(
+                    self.get_content(client, url, fast=True),
+                    self.get_content(client, url, fast=False),
+                )
+
+    def test_anonymous_output_matches_drf(self):
+        self.assert_same_output(APIClient(), CHECKED_URLS)
+
+    def test_user_output_matches_drf(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        self.assert_same_output(client, CHECKED_URLS + SUBSCRIPTION_URLS)
@@ -0,0 +1,78 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import Favorite
+from users.models import Follow
+from .fixtures import (
+    create_ingredient,
+    create_recipe,
+    create_tag,
+    create_user
+)
+
+DUMMY_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+}
+
+# Страницы ленты, число запросов которых не должно зависеть от limit
+FEED_PATHS = (
+    "/api/recipes/?limit={limit}",
+    "/api/recipes/?is_favorited=1&limit={limit}",
+    "/api/recipes/?tags={tag}&limit={limit}",
+)
+LIMITS = (1, 50)
+
+
+@override_settings(CACHES=DUMMY_CACHES)
+class FeedQueryScalingTest(TestCase):
+    """Число запросов страницы ленты не растет с размером страницы"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = create_user("scale")
+        authors = [create_user(f"scale_{number}") for number in range(5)]
+        cls.tags = [
+            create_tag(f"scale_tag_{number}", f"#ABCDE{number}")
+            for number in range(3)
+        ]
+        ingredients = [
+            create_ingredient(f"тест масштаб {number}") for number in range(4)
+        ]
+        for number in range(max(LIMITS)):
+            recipe = create_recipe(
+                authors[number % len(authors)],
+                f"scale {number}",
+                tags=(cls.tags[0], cls.tags[number % 2 + 1]),
+                amounts=[
+                    (ingredients[(number + offset) % 4], number + 1)
+                    for offset in range(2)
+                ],
+                image="recipes/images/scale.png",
+            )
+            Favorite.objects.create(user=cls.user, recipe=recipe)
+        Follow.objects.create(user=cls.user, author=authors[0])
+
+    def count_queries(self, url):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with CaptureQueriesContext(connection) as queries:
+            response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_does_not_depend_on_limit(self):
+        for fast in (False, True):
+            for path in FEED_PATHS:
+                with self.subTest(fast=fast, path=path):
+                    with override_settings(FAST_READ_SERIALIZERS=fast):
+                        counts = {
+                            limit: self.count_queries(
+                                path.format(
+                                    tag=self.tags[0].slug, limit=limit
+                                )
+                            )
+                            for limit in LIMITS
+                        }
+                    self.assertEqual(counts[1], counts[max(LIMITS)], counts)
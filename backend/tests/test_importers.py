@@ -0,0 +1,48 @@
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from recipes.importers import BulkImporter, CopyImporter
+from recipes.models import Tag
+from .fixtures import create_tag
+
+ROWS = (
+    {"slug": "green", "name": "green", "color": "#00FF00"},
+    # Повтор ключа: остается последняя строка
+    {"slug": "green", "name": "зеленый", "color": "#00FF00"},
+    # Имя занято существующим тегом
+    {"slug": "crimson", "name": "red", "color": "#DC143C"},
+    # Цвет занят более ранней строкой файла
+    {"slug": "blue", "name": "blue", "color": "#00FF00"},
+    {"slug": "red", "name": "red", "color": "#FF0001"},
+)
+EXPECTED = [
+    ("green", "зеленый", "#00FF00"),
+    ("red", "red", "#FF0001"),
+]
+
+
+class BulkImporterTest(TestCase):
+    """Повторы ключа и конфликты по уникальным полям при загрузке тегов"""
+
+    importer_class = BulkImporter
+
+    def setUp(self):
+        create_tag("red", "#FF0000")
+
+    def test_duplicates_and_unique_conflicts(self):
+        self.importer_class(Tag, ("slug",)).run(ROWS)
+        self.assertEqual(
+            list(
+                Tag.objects.order_by("slug").values_list(
+                    "slug", "name", "color"
+                )
+            ),
+            EXPECTED,
+        )
+
+
+@skipUnless(connection.vendor == "postgresql", "COPY есть только в PostgreSQL")
+class CopyImporterTest(BulkImporterTest):
+    importer_class = CopyImporter
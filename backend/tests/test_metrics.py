@@ -0,0 +1,39 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.test import SimpleTestCase
+
+from api.metrics import DURATION_BUCKETS, Histogram, MetricsRegistry
+
+
+class MetricsRegistryTest(SimpleTestCase):
+    """Метрики процесса под параллельной записью из пула потоков"""
+
+    threads = 8
+    observations = 2000
+
+    def test_concurrent_observations_are_not_lost(self):
+        histogram = Histogram("test_seconds", "Тест", DURATION_BUCKETS)
+
+        def observe(_):
+            for _ in range(self.observations):
+                histogram.observe("endpoint", 0.01)
+
+        with ThreadPoolExecutor(self.threads) as executor:
+            list(executor.map(observe, range(self.threads)))
+        counts, total = histogram.series["endpoint"]
+        self.assertEqual(sum(counts), self.threads * self.observations)
+
+    def test_series_are_labelled_with_worker(self):
+        registry = MetricsRegistry()
+        registry.increment("foodgram_db_pool_checkouts_total", "default")
+        registry.record_pool_checkout("default", 0.002, acquired=True)
+        worker = f'worker="{os.getpid()}"'
+        series = [
+            line
+            for line in registry.render().splitlines()
+            if line and not line.startswith("#")
+        ]
+        self.assertTrue(series)
+        for line in series:
+            self.assertIn(worker, line)
@@ -0,0 +1,127 @@
+import json
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api.shopping_list import ShoppingList
+from recipes.models import Cart, Favorite, Recipe
+from users.models import Follow
+from .fixtures import (
+    create_ingredient,
+    create_recipe,
+    create_tag,
+    create_user
+)
+
+UserModel = get_user_model()
+
+DUMMY_CACHES = {
+    "default": {"BACKEND": "django.core.cache.backends.dummy.DummyCache"}
+}
+
+QUERY_BUDGETS = {
+    "/api/recipes/": 5,
+    "/api/recipes/?is_favorited=1": 5,
+    "/api/recipes/?tags={tag}": 6,
+    "/api/recipes/{recipe}/": 4,
+    "/api/users/subscriptions/": 3,
+    "/api/recipes/download_shopping_cart/": 2,
+    "/api/ingredients/?name=т": 1,
+    "/api/tags/": 1,
+}
+
+
+def find_seq_scans(plan):
+    if plan.get("Node Type") == "Seq Scan":
+        yield plan["Relation Name"]
+    for subplan in plan.get("Plans", ()):
+        yield from find_seq_scans(subplan)
+
+
+class HotQueriesTestCase(TestCase):
+    """Пользователь с избранным, корзиной и подпиской"""
+
+    @classmethod
+    def setUpTestData(cls):
+        users = [create_user(f"plan_{number}") for number in range(2)]
+        cls.user = users[0]
+        cls.tag = create_tag("plan_tag", "#123456")
+        ingredient = create_ingredient("тест план")
+        for number in range(3):
+            cls.recipe = create_recipe(
+                users[number % 2],
+                f"plan {number}",
+                tags=(cls.tag,),
+                amounts=[(ingredient, number + 1)],
+                image="recipes/images/plan.png",
+            )
+            Favorite.objects.create(user=cls.user, recipe=cls.recipe)
+            Cart.objects.create(user=cls.user, recipe=cls.recipe)
+        Follow.objects.create(user=cls.user, author=users[1])
+
+
+@skipUnless(connection.vendor == "postgresql", "Планы только в PostgreSQL")
+class QueryPlanTest(HotQueriesTestCase):
+    """Горячие запросы обходятся без Seq Scan"""
+
+    def get_hot_queries(self):
+        feed = Recipe.objects.for_feed(self.user)
+        return {
+            "лента": feed[:6],
+            "избранное": feed.filter(
+                favorite__user=self.user, is_favorited=True
+            )[:6],
+            "корзина": feed.filter(
+                cart__user=self.user, is_in_shopping_cart=True
+            )[:6],
+            "теги": feed.filter(
+                tags__slug__in=[self.tag.slug]
+            ).distinct()[:6],
+            "автор": feed.filter(author=self.user)[:6],
+            "список покупок": ShoppingList(self.user).get_queryset(),
+            "подписки": UserModel.objects.filter(
+                following__user=self.user
+            )[:6],
+        }
+
+    def explain(self, cursor, queryset):
+        sql, params = queryset.query.sql_with_params()
+        cursor.execute(f"EXPLAIN (FORMAT JSON) {sql}", params)
+        plan = cursor.fetchone()[0]
+        if isinstance(plan, str):
+            plan = json.loads(plan)
+        return plan[0]["Plan"]
+
+    def test_hot_queries_use_indexes(self):
+        with connection.cursor() as cursor:
+            # На маленьких таблицах планировщик иначе выберет Seq Scan
+            cursor.execute("SET LOCAL enable_seqscan = off")
+            try:
+                for name, queryset in self.get_hot_queries().items():
+                    with self.subTest(query=name):
+                        plan = self.explain(cursor, queryset)
+                        self.assertEqual(set(find_seq_scans(plan)), set())
+            finally:
+                cursor.execute("RESET enable_seqscan")
+
+
+@override_settings(CACHES=DUMMY_CACHES)
+class QueryBudgetTest(HotQueriesTestCase):
+    """Число запросов к БД на основных эндпоинтах"""
+
+    def test_query_budgets(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        for fast in (False, True):
+            for path, budget in QUERY_BUDGETS.items():
+                url = path.format(tag=self.tag.slug, recipe=self.recipe.pk)
+                with self.subTest(fast=fast, url=url):
+                    with override_settings(FAST_READ_SERIALIZERS=fast):
+                        with self.assertNumQueries(budget):
+                            response = client.get(url)
+                            if response.streaming:
+                                b"".join(response.streaming_content)
+                    self.assertEqual(response.status_code, 200)
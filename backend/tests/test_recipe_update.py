@@ -0,0 +1,78 @@
+from django.test import TestCase
+
+from api.serializers import RecipeCreateSerializer
+from recipes.models import IngredientAmount, Recipe
+from .fixtures import (
+    create_ingredient,
+    create_recipe,
+    create_tag,
+    create_user
+)
+
+
+class RecipeUpdateTest(TestCase):
+    """Правка рецепта поверх параллельно измененных ингредиентов и тегов"""
+
+    def setUp(self):
+        self.tags = [
+            create_tag(f"update_{number}", f"#00AA0{number}")
+            for number in range(2)
+        ]
+        self.ingredients = [
+            create_ingredient(f"правка {number}") for number in range(2)
+        ]
+        recipe = create_recipe(
+            create_user("update"),
+            "update",
+            tags=self.tags[:1],
+            amounts=[(self.ingredients[0], 1)],
+        )
+        # Экземпляр с prefetch, как его получает view до правки
+        self.instance = Recipe.objects.prefetch_related(
+            "ingredients_amount", "tags"
+        ).get(pk=recipe.pk)
+        list(self.instance.ingredients_amount.all())
+        list(self.instance.tags.all())
+        # Параллельная правка после чтения экземпляра
+        IngredientAmount.objects.create(
+            recipe=recipe, ingredient=self.ingredients[1], amount=5
+        )
+        recipe.tags.add(self.tags[1])
+
+    def update(self, amounts, tags):
+        RecipeCreateSerializer().update(
+            self.instance,
+            {
+                "ingredients_amount": [
+                    {"ingredient": {"id": ingredient}, "amount": amount}
+                    for ingredient, amount in amounts
+                ],
+                "tags": tags,
+            },
+        )
+
+    def test_removes_rows_missing_from_prefetch(self):
+        self.update([(self.ingredients[0], 2)], self.tags[:1])
+        self.assertEqual(
+            list(
+                IngredientAmount.objects.filter(
+                    recipe=self.instance
+                ).values_list("ingredient_id", "amount")
+            ),
+            [(self.ingredients[0].pk, 2)],
+        )
+        self.assertEqual(
+            list(self.instance.tags.values_list("pk", flat=True)),
+            [self.tags[0].pk],
+        )
+
+    def test_updates_rows_missing_from_prefetch(self):
+        self.update(
+            [(self.ingredients[0], 1), (self.ingredients[1], 7)], self.tags
+        )
+        self.assertEqual(
+            IngredientAmount.objects.get(
+                recipe=self.instance, ingredient=self.ingredients[1]
+            ).amount,
+            7,
+        )
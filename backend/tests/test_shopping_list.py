@@ -0,0 +1,56 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from recipes.models import Cart
+from .fixtures import create_ingredient, create_recipe, create_user
+
+LOCMEM_CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "shopping_list_tests",
+    }
+}
+URL = "/api/recipes/download_shopping_cart/"
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ShoppingListCacheTest(TestCase):
+    """Закэшированный список покупок обновляется вместе с данными"""
+
+    def setUp(self):
+        self.user = create_user("cart")
+        self.ingredient = create_ingredient("мука")
+        recipe = create_recipe(
+            self.user, "cart", amounts=[(self.ingredient, 200)]
+        )
+        Cart.objects.create(user=self.user, recipe=recipe)
+        self.extra = create_recipe(
+            self.user, "cart extra", amounts=[(self.ingredient, 50)]
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def download(self):
+        response = self.client.get(URL)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_amounts_are_summed_per_ingredient(self):
+        Cart.objects.create(user=self.user, recipe=self.extra)
+        content = self.download()
+        self.assertIn("мука 250 г", content)
+        self.assertEqual(content.count("мука"), 1)
+
+    def test_ingredient_change_refreshes_list(self):
+        self.assertIn("мука 200 г", self.download())
+        self.ingredient.name = "мука пшеничная"
+        self.ingredient.measurement_unit = "кг"
+        self.ingredient.save()
+        self.assertIn("мука пшеничная 200 кг", self.download())
+
+    def test_username_change_refreshes_title(self):
+        self.assertIn("Список покупок cart:", self.download())
+        self.user.username = "renamed"
+        self.user.save()
+        self.client.force_authenticate(self.user)
+        self.assertIn("Список покупок renamed:", self.download())
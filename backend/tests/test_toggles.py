@@ -0,0 +1,73 @@
+import random
+from concurrent.futures import ThreadPoolExecutor
+from unittest import skipIf
+
+from django.db import connection
+from django.test import TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from recipes.models import Cart, Favorite, Recipe
+from .fixtures import create_recipe, create_user
+
+TOGGLES = {
+    "favorite": (Favorite, "favorites_count"),
+    "shopping_cart": (Cart, "carts_count"),
+}
+ALLOWED_STATUSES = {200, 201, 204}
+
+
+@skipIf(connection.vendor == "sqlite", "Нужна база с параллельной записью")
+class ToggleConcurrencyTest(TransactionTestCase):
+    """Параллельные переключения избранного и корзины"""
+
+    threads = 8
+    requests = 25
+
+    def setUp(self):
+        self.user = create_user("toggle")
+        self.recipe = create_recipe(self.user, "toggle")
+
+    def get_client(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        return client
+
+    def hammer(self, url, seed):
+        rng = random.Random(seed)
+        client = self.get_client()
+        try:
+            return [
+                rng.choice((client.post, client.delete))(url).status_code
+                for _ in range(self.requests)
+            ]
+        finally:
+            connection.close()
+
+    def test_concurrent_toggles_keep_counters(self):
+        for name, (model, counter) in TOGGLES.items():
+            with self.subTest(toggle=name):
+                url = f"/api/recipes/{self.recipe.pk}/{name}/"
+                with ThreadPoolExecutor(self.threads) as executor:
+                    results = executor.map(
+                        self.hammer,
+                        [url] * self.threads,
+                        range(self.threads),
+                    )
+                    statuses = {code for codes in results for code in codes}
+                self.assertLessEqual(statuses, ALLOWED_STATUSES)
+                self.assertEqual(
+                    getattr(Recipe.objects.get(pk=self.recipe.pk), counter),
+                    model.objects.filter(recipe=self.recipe).count(),
+                )
+
+    def test_toggle_is_single_statement(self):
+        client = self.get_client()
+        for name in TOGGLES:
+            url = f"/api/recipes/{self.recipe.pk}/{name}/"
+            for method in ("post", "post", "delete", "delete"):
+                with self.subTest(toggle=name, method=method):
+                    with CaptureQueriesContext(connection) as queries:
+                        response = getattr(client, method)(url)
+                    self.assertIn(response.status_code, ALLOWED_STATUSES)
+                    self.assertLessEqual(len(queries), 2)
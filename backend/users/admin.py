@@ -12,23 +12,11 @@ class UserAdmin(admin.ModelAdmin):
         'first_name',
         'last_name',
         'role',
-        'get_recipe_count',
-        'get_follower_count',
-        'get_following_count',
+        'recipes_count',
+        'followers_count',
+        'subscriptions_count',
         'is_staff'
     )
     list_filter = ('role', 'is_staff', 'is_superuser')
     search_fields = ('username', 'email', 'first_name', 'last_name')
     ordering = ('id',)
-
-    def get_recipe_count(self, obj):
-        return obj.recipes.count()
-    get_recipe_count.short_description = 'Количество рецептов'
-
-    def get_follower_count(self, obj):
-        return obj.follower.count()
-    get_follower_count.short_description = 'Количество подписчиков'
-
-    def get_following_count(self, obj):
-        return obj.following.count()
-    get_following_count.short_description = 'Количество подписок'
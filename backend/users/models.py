@@ -2,7 +2,32 @@ from django.contrib.auth.models import AbstractUser
 from django.db import models
 
 
-class User(AbstractUser):
+class CounterFieldsMixin:
+    """Счетчики меняются только атомарными UPDATE из сигналов.
+
+    Обычное сохранение существующей записи пишет все поля, кроме
+    счетчиков, чтобы не затереть их значениями из памяти.
+    """
+
+    counter_fields = ()
+
+    def save(self, force_insert=False, force_update=False, using=None,
+             update_fields=None):
+        if update_fields is None and not force_insert and not (
+            self._state.adding
+        ):
+            deferred = self.get_deferred_fields()
+            update_fields = [
+                field.attname
+                for field in self._meta.concrete_fields
+                if not field.primary_key
+                and field.name not in self.counter_fields
+                and field.attname not in deferred
+            ]
+        super().save(force_insert, force_update, using, update_fields)
+
+
+class User(CounterFieldsMixin, AbstractUser):
     """Кастомная модель пользователя"""
 
     USERNAME_FIELD = "email"
@@ -35,6 +60,20 @@ class User(AbstractUser):
         choices=CHOICE_ROLE,
         verbose_name="Статус пользователя в системе",
     )
+    recipes_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Количество рецептов"
+    )
+    followers_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Количество подписчиков"
+    )
+    subscriptions_count = models.PositiveIntegerField(
+        default=0, editable=False, verbose_name="Количество подписок"
+    )
+    counter_fields = (
+        "recipes_count",
+        "followers_count",
+        "subscriptions_count",
+    )
 
     class Meta:
         ordering = ("id",)
@@ -71,6 +110,11 @@ class Follow(models.Model):
         ordering = ("user", "author")
         verbose_name = "Подписка"
         verbose_name_plural = "Подписки"
+        indexes = [
+            models.Index(
+                fields=["user", "author"], name="follow_user_author_idx"
+            )
+        ]
 
     def __str__(self) -> str:
         return f"{self.user.username} подписан на {self.author.username}"
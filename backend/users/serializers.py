@@ -66,6 +66,8 @@ class UserReadSerializer(UserSerializer):
         )
 
     def get_is_subscribed(self, author):
+        if hasattr(author, "is_subscribed"):
+            return author.is_subscribed
         request = self.context.get("request")
         if request and request.user.is_authenticated:
             return request.user.follower.filter(author=author).exists()
@@ -108,9 +110,7 @@ class FollowAuthorSerializer(serializers.ModelSerializer):
     email = serializers.ReadOnlyField()
     username = serializers.ReadOnlyField()
     is_subscribed = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(
-        source="recipes.count", read_only=True
-    )
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = UserModel
@@ -155,9 +155,7 @@ class FollowListSerializer(serializers.ModelSerializer):
     """Сериализатор списка подписок на авторов"""
     is_subscribed = serializers.SerializerMethodField()
     recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(
-        source="recipes.count", read_only=True
-    )
+    recipes_count = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = UserModel
@@ -173,6 +171,8 @@ class FollowListSerializer(serializers.ModelSerializer):
         )
 
     def get_is_subscribed(self, author):
+        if hasattr(author, "is_subscribed"):
+            return author.is_subscribed
         user = self.context["request"].user
         return (
             user.is_authenticated
@@ -180,8 +180,9 @@ class FollowListSerializer(serializers.ModelSerializer):
         )
 
     def get_recipes(self, obj):
-        """Вывод списка рецептов"""
-        from api.serializers import RecipeSerializer
-        recipes = obj.recipes.all().order_by('-pub_date')[:3]
-        serializer = RecipeSerializer(recipes, many=True, read_only=True)
+        """Вывод последних рецептов автора, выбранных во вьюсете"""
+        from api.serializers import RecipeMiniSerializer
+        serializer = RecipeMiniSerializer(
+            obj.latest_recipes, many=True, read_only=True, context=self.context
+        )
         return serializer.data
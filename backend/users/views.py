@@ -1,10 +1,23 @@
+from django.db.models import (
+    BooleanField,
+    OuterRef,
+    Prefetch,
+    Subquery,
+    Value
+)
 from django.shortcuts import get_object_or_404
 from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
+from django.conf import settings
 from django.contrib.auth import get_user_model
 
+from api.async_views import AsyncReadMixin
+from api.fast_serializers import FastFollowListSerializer
+from api.metrics import SerializerTimingMixin
+from api.params import RECIPES_LIMIT
+from recipes.models import Recipe
 from .models import Follow
 from .serializers import (
     FollowAuthorSerializer,
@@ -19,6 +32,8 @@ User = get_user_model()
 
 
 class UserViewSet(
+    AsyncReadMixin,
+    SerializerTimingMixin,
     mixins.CreateModelMixin,
     mixins.ListModelMixin,
     mixins.RetrieveModelMixin,
@@ -27,12 +42,17 @@ class UserViewSet(
     """Вьюсет для работы с пользователями"""
 
     queryset = User.objects.all()
+    async_actions = ("subscriptions",)
 
     def get_serializer_class(self):
         if self.action in ("me", "list", "retrieve"):
             return UserReadSerializer
         if self.action == "set_password":
             return SetPasswordSerializer
+        if self.action == "subscriptions":
+            if settings.FAST_READ_SERIALIZERS:
+                return FastFollowListSerializer
+            return FollowListSerializer
         return UserCreateSerializer
 
     def get_permissions(self):
@@ -87,14 +107,50 @@ class UserViewSet(
         get_object_or_404(Follow, user=request.user, author=author).delete()
         return Response("Вы отписались", status=status.HTTP_204_NO_CONTENT)
 
+    def get_recipes_limit(self):
+        recipes_limit = self.request.query_params.get("recipes_limit", "")
+        if recipes_limit.isdigit():
+            return int(recipes_limit)
+        return RECIPES_LIMIT
+
+    def get_latest_recipes(self):
+        """Последние рецепты каждого автора для списка подписок"""
+        latest_recipes = Recipe.objects.filter(
+            author=OuterRef("author")
+        ).order_by("-pub_date").values("pk")[:self.get_recipes_limit()]
+        return Recipe.objects.filter(pk__in=Subquery(latest_recipes))
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action == "subscriptions":
+            context["latest_recipes"] = self.get_latest_recipes()
+        return context
+
     @action(
         detail=False, methods=["GET"], permission_classes=(IsAuthenticated,)
     )
     def subscriptions(self, request):
         """Вывод списка подписок"""
-        queryset = User.objects.filter(following__user=request.user)
-        pagin = self.paginate_queryset(queryset)
-        serializer = FollowListSerializer(
-            pagin, context={"request": request}, many=True
-        )
+        if settings.FAST_READ_SERIALIZERS:
+            pagin = self.paginate_queryset(
+                FastFollowListSerializer.get_rows(
+                    User.objects.filter(following__user=request.user)
+                )
+            )
+        else:
+            queryset = (
+                User.objects.filter(following__user=request.user)
+                .annotate(
+                    is_subscribed=Value(True, output_field=BooleanField()),
+                )
+                .prefetch_related(
+                    Prefetch(
+                        "recipes",
+                        queryset=self.get_latest_recipes(),
+                        to_attr="latest_recipes",
+                    )
+                )
+            )
+            pagin = self.paginate_queryset(queryset)
+        serializer = self.get_serializer(pagin, many=True)
         return self.get_paginated_response(serializer.data)